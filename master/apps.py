@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MasterConfig(AppConfig):
     name = 'master'
+
+    def ready(self):
+        from . import bootstrap, versioning
+        versioning.track(bootstrap.MODELS)
@@ -0,0 +1,126 @@
+# bootstrap.py
+"""
+All active master data in one payload, for frontend start-up.
+
+The payload is split into sections, each cached under a key built from the
+version counters of the tables it is made of (see master.versioning), so a
+write to any master table simply makes its section's key unused. A warm
+bootstrap is one cache round trip.
+
+The response's `version` token encodes those counters. Sending it back as
+`?since=<token>` returns only the sections whose tables changed since.
+
+Sections are stored in the counters' cache (MASTER_VERSION_CACHE). When that
+cache is process-local the counters only see this worker's writes, so
+sections are kept for MASTER_BOOTSTRAP_LOCAL_CACHE_TTL seconds only and
+`?since=` always gets the full payload.
+"""
+from django.conf import settings
+
+from . import versioning
+from .models import Entity, Department, Location, Task, SubTask, Role, Platform, Status
+from .serializers import (
+    EntitySerializer, DepartmentSerializer, LocationSerializer, TaskSerializer,
+    SubTaskSerializer, RoleSerializer, PlatformSerializer, StatusSerializer,
+)
+
+# Order matters: it is the layout of the version token
+MODELS = (Entity, Department, Location, Task, SubTask, Role, Platform, Status)
+
+# section -> tables it is built from
+SECTIONS = {
+    'entities': (Entity,),
+    'departments': (Department,),
+    'locations': (Location,),
+    'tasks': (Task, SubTask),
+    'roles': (Role,),
+    'platforms': (Platform,),
+    'statuses': (Status,),
+}
+
+SIMPLE_SECTIONS = {
+    'entities': (Entity, EntitySerializer),
+    'departments': (Department, DepartmentSerializer),
+    'locations': (Location, LocationSerializer),
+    'roles': (Role, RoleSerializer),
+    'platforms': (Platform, PlatformSerializer),
+    'statuses': (Status, StatusSerializer),
+}
+
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _base36(number):
+    if number == 0:
+        return '0'
+    digits = []
+    while number:
+        number, rest = divmod(number, 36)
+        digits.append(_DIGITS[rest])
+    return ''.join(reversed(digits))
+
+
+def current_versions():
+    return versioning.get_versions(MODELS)
+
+
+def encode_version(versions):
+    return '.'.join(_base36(versions[model]) for model in MODELS)
+
+
+def decode_version(token):
+    """Inverse of encode_version(); raises ValueError for a malformed token."""
+    parts = token.split('.')
+    if len(parts) != len(MODELS):
+        raise ValueError("Malformed version token")
+    return {model: int(part, 36) for model, part in zip(MODELS, parts)}
+
+
+def changed_sections(old_versions, versions):
+    return [
+        name for name, models in SECTIONS.items()
+        if any(old_versions[model] != versions[model] for model in models)
+    ]
+
+
+def _section_key(name, versions):
+    counters = '-'.join(str(versions[model]) for model in SECTIONS[name])
+    return f"master:bootstrap:{name}:{counters}"
+
+
+def _build(name):
+    if name == 'tasks':
+        subtasks = {}
+        for subtask in SubTaskSerializer(SubTask.objects.filter(is_active=True), many=True).data:
+            subtasks.setdefault(subtask['task_id'], []).append(subtask)
+
+        tasks = []
+        for task in TaskSerializer(Task.objects.filter(is_active=True), many=True).data:
+            tasks.append({**task, 'subtasks': subtasks.get(task['id'], [])})
+        return tasks
+
+    model, serializer = SIMPLE_SECTIONS[name]
+    return list(serializer(model.objects.filter(is_active=True), many=True).data)
+
+
+def _ttl():
+    if versioning.is_shared():
+        return getattr(settings, 'MASTER_BOOTSTRAP_CACHE_TTL', 24 * 60 * 60)
+    return getattr(settings, 'MASTER_BOOTSTRAP_LOCAL_CACHE_TTL', 30)
+
+
+def get_sections(names, versions):
+    """Return ({section: data}, all_cached) for the given section names."""
+    cache = versioning.get_cache()
+    keys = {_section_key(name, versions): name for name in names}
+    found = cache.get_many(list(keys))
+
+    missing = {}
+    for key, name in keys.items():
+        if key not in found:
+            missing[key] = _build(name)
+    if missing:
+        cache.set_many(missing, _ttl())
+
+    data = {**found, **missing}
+    return {name: data[key] for key, name in keys.items()}, not missing
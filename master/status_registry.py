@@ -0,0 +1,128 @@
+# status_registry.py
+"""
+Process-local cache of Status rows used by the approval workflow.
+
+The workflow only cares about three canonical statuses. They used to be looked
+up with `Status.objects.filter(name__iexact=...)` on every write; the registry
+loads the whole (small) table once and answers from memory afterwards.
+
+The registry follows the Status version counter (master.versioning), which
+is bumped by every committed Status write. With the shared counter cache
+each worker compares it at most once per STATUS_REGISTRY_CHECK_INTERVAL
+seconds (default 1) and reloads when it moved. With a process-local counter
+cache the registry is reloaded every STATUS_REGISTRY_TTL seconds (default 30)
+instead. StatusAPIView also calls `invalidate()` for its own worker.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from . import versioning
+from .models import Status
+
+DRAFT = 'draft'
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+# Accepted spellings per canonical status, in order of preference
+CANONICAL_NAMES = {
+    DRAFT: ('draft',),
+    IN_PROGRESS: ('in progress', 'inprogress'),
+    COMPLETED: ('completed', 'done'),
+}
+
+_lock = threading.Lock()
+_by_id = {}
+_by_name = {}
+_loaded_at = None
+_loaded_version = None
+_checked_at = None
+
+
+def normalize(name):
+    return (name or '').strip().lower()
+
+
+def _ttl():
+    return getattr(settings, 'STATUS_REGISTRY_TTL', 30)
+
+
+def _check_interval():
+    return getattr(settings, 'STATUS_REGISTRY_CHECK_INTERVAL', 1)
+
+
+def _load():
+    global _by_id, _by_name, _loaded_at
+
+    by_id = {}
+    by_name = {}
+    for obj in Status.objects.order_by('id'):
+        by_id[obj.id] = obj
+        # Keep the lowest id per name, same as `.filter(name__iexact=...).first()`
+        by_name.setdefault(normalize(obj.name), obj)
+
+    _by_id, _by_name, _loaded_at = by_id, by_name, time.monotonic()
+
+
+def _ensure_loaded():
+    global _loaded_version, _checked_at
+    shared = versioning.is_shared()
+    interval = _check_interval() if shared else _ttl()
+    now = time.monotonic()
+    if _loaded_at is not None and now - _checked_at < interval:
+        return
+
+    with _lock:
+        if _loaded_at is not None and now - _checked_at < interval:
+            return
+        if not shared:
+            _load()
+        else:
+            # Read before loading: the rows are then at least this new
+            version = versioning.get_versions([Status])[Status]
+            if _loaded_at is None or version != _loaded_version:
+                _load()
+            _loaded_version = version
+        _checked_at = now
+
+
+def invalidate():
+    global _loaded_at
+    with _lock:
+        _loaded_at = None
+
+
+def get_by_id(status_id):
+    _ensure_loaded()
+    return _by_id.get(status_id)
+
+
+def get_by_name(name):
+    _ensure_loaded()
+    return _by_name.get(normalize(name))
+
+
+def get(canonical):
+    """
+    Return the Status row for DRAFT / IN_PROGRESS / COMPLETED, or None if the
+    table has no matching row.
+    """
+    _ensure_loaded()
+    for name in CANONICAL_NAMES[canonical]:
+        obj = _by_name.get(name)
+        if obj is not None:
+            return obj
+    return None
+
+
+def draft():
+    return get(DRAFT)
+
+
+def in_progress():
+    return get(IN_PROGRESS)
+
+
+def completed():
+    return get(COMPLETED)
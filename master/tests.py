@@ -1,3 +1,108 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import User
+from . import status_registry, versioning
+from .models import Platform, Status
+
+
+class ConditionalGetTests(TestCase):
+    url = "/master/platform/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(name="alice@example.com"))
+        Platform.objects.create(name="Web", created_by=1, modified_by=1)
+
+    def get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_matching_etag_is_answered_with_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(response["ETag"]).status_code, 304)
+
+    def test_api_write_changes_the_etag(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"name": "Mobile", "created_by": 1, "modified_by": 1}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_write_outside_the_api_changes_the_etag(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Platform.objects.create(name="Shell", created_by=1, modified_by=1)
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_counter_is_bumped_only_on_commit(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Platform.objects.create(name="Pending", created_by=1, modified_by=1)
+            self.assertEqual(self.get(etag).status_code, 304)
+        self.assertEqual(len(callbacks), 1)
+
+    @override_settings(MASTER_VERSION_CACHE='default')
+    def test_no_etag_with_a_process_local_cache(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertEqual(self.get('*').status_code, 200)
+
+
+class BootstrapTests(TestCase):
+    url = "/master/bootstrap/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(name="alice@example.com"))
+        Platform.objects.create(name="Web", created_by=1, modified_by=1)
+
+    def test_since_returns_only_changed_sections(self):
+        version = self.client.get(self.url).data["version"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Platform.objects.create(name="Mobile", created_by=1, modified_by=1)
+
+        response = self.client.get(self.url, {"since": version})
+        self.assertTrue(response.data["delta"])
+        self.assertEqual([platform["name"] for platform in response.data["platforms"]], ["Web", "Mobile"])
+        self.assertNotIn("statuses", response.data)
+
+    def test_cached_sections_follow_the_counters(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            Platform.objects.create(name="Mobile", created_by=1, modified_by=1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["platforms"]), 2)
+
+    @override_settings(MASTER_VERSION_CACHE='default')
+    def test_since_is_ignored_with_a_process_local_cache(self):
+        version = self.client.get(self.url).data["version"]
+        response = self.client.get(self.url, {"since": version})
+        self.assertFalse(response.data["delta"])
+        self.assertIn("statuses", response.data)
+
+
+@override_settings(STATUS_REGISTRY_CHECK_INTERVAL=0)
+class StatusRegistryTests(TestCase):
+    def setUp(self):
+        self.draft = Status.objects.create(name="Draft", created_by=1, modified_by=1)
+        status_registry.invalidate()
+
+    def test_reloads_when_another_worker_bumps_the_counter(self):
+        self.assertEqual(status_registry.draft(), self.draft)
+
+        # Renamed elsewhere: this process's registry is not invalidated
+        Status.objects.filter(pk=self.draft.pk).update(name="Archived")
+        self.assertEqual(status_registry.draft(), self.draft)
+
+        versioning.bump(Status)
+        self.assertIsNone(status_registry.draft())
+        self.assertEqual(status_registry.get_by_id(self.draft.pk).name, "Archived")
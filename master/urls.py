@@ -9,11 +9,13 @@ from .views import (
     PlatformAPIView,
     StatusAPIView,
     HolidayAPIView,
-    EmailTemplateAPIView
+    EmailTemplateAPIView,
+    MasterBootstrapAPIView
 )
 
 urlpatterns = [
    
+    path('bootstrap/', MasterBootstrapAPIView.as_view(), name='master-bootstrap'),
     path('entity/', EntityAPIView.as_view()),          # GET(list), POST
     path('entity/<int:pk>/', EntityAPIView.as_view()),
     path('department/', DepartmentAPIView.as_view() ),
@@ -0,0 +1,143 @@
+# versioning.py
+"""
+Per-table version counters for master data, used for conditional GETs.
+
+Each master model has a counter in the cache (MASTER_VERSION_CACHE, default
+'default') that is bumped when a write to its table commits: post_save /
+post_delete receivers (see `track`, wired up in MasterConfig.ready) catch
+API, admin and shell writes alike. QuerySet.update() sends no signals; call
+`bump()` after one. GET responses carry an ETag derived from the counters
+the response depends on, and a request whose If-None-Match still matches is
+answered with 304 before any query runs.
+
+The counters must live in a cache shared by all worker processes (the
+database cache configured as 'shared' in settings, Redis, Memcached). With a
+process-local backend (LocMemCache, DummyCache) a write seen by one worker
+would not change the ETags served by the others, so no ETags are sent at all.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'master:version:'
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    return caches[getattr(settings, 'MASTER_VERSION_CACHE', 'default')]
+
+
+def is_shared():
+    """True when every worker process sees the same counters."""
+    return not isinstance(get_cache(), PROCESS_LOCAL_BACKENDS)
+
+
+def _key(model):
+    return f"{KEY_PREFIX}{model._meta.label_lower}"
+
+
+def get_versions(models):
+    """{model: version}; unknown counters are started at a fresh value."""
+    cache = get_cache()
+    keys = {_key(model): model for model in models}
+    found = cache.get_many(list(keys))
+
+    versions = {}
+    for key, model in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions[model] = found[key]
+    return versions
+
+
+def bump(model):
+    cache = get_cache()
+    try:
+        cache.incr(_key(model))
+    except ValueError:
+        # Missing or evicted: any never-used value invalidates old ETags
+        cache.set(_key(model), time.time_ns(), None)
+
+
+def _bump_on_commit(model, **kwargs):
+    # After commit: bumping earlier would let another worker tag (and cache)
+    # the old rows with the new version
+    transaction.on_commit(partial(bump, model), using=kwargs.get('using'))
+
+
+def track(models):
+    """Bump each model's counter whenever a row is saved or deleted."""
+    for model in models:
+        receiver = partial(_bump_on_commit, model)
+        uid = f"master.versioning:{model._meta.label_lower}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}:save")
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}:delete")
+
+
+class _NotModified(Exception):
+    pass
+
+
+class VersionedMasterMixin:
+    """
+    Conditional GET for master-data APIViews.
+
+    The ETag covers `versioned_model` and `depends_on`, other models whose
+    changes alter this view's output (read-only views may set only
+    `depends_on`). Every model listed must be `track`ed.
+    """
+    versioned_model = None
+    depends_on = ()
+    cache_control = 'private, no-cache'
+
+    def get_etag(self, request):
+        models = (self.versioned_model, *self.depends_on) if self.versioned_model else self.depends_on
+        versions = get_versions(models)
+        parts = [
+            request.path,
+            request.GET.urlencode(),
+            getattr(request, 'accepted_media_type', '') or '',
+            *(f"{model._meta.label_lower}={version}" for model, version in versions.items()),
+        ]
+        digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+        return f'"{digest}"'
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication, permissions and content negotiation come first
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method in SAFE_METHODS and is_shared():
+            self.etag = self.get_etag(request)
+            if_none_match = request.headers.get('If-None-Match', '')
+            candidates = [tag.strip() for tag in if_none_match.split(',')]
+            if self.etag in candidates or '*' in candidates:
+                raise _NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if request.method in SAFE_METHODS:
+            if getattr(self, 'etag', None) and response.status_code in (200, 304):
+                response['ETag'] = self.etag
+                response['Cache-Control'] = self.cache_control
+        return response
@@ -5,11 +5,14 @@ from rest_framework import status
 from django.shortcuts import get_object_or_404
 
 from .models import Entity, Department, Location, Task ,SubTask, Role, Platform, Status,Holiday,EmailTemplate
+from . import bootstrap, status_registry, versioning
+from .versioning import VersionedMasterMixin
 
 from .serializers import EntitySerializer,DepartmentSerializer, LocationSerializer, TaskSerializer, SubTaskSerializer, RoleSerializer, PlatformSerializer,StatusSerializer,HolidaySerializer,EmailTemplateSerializer
 
 # Create your views here.
-class EntityAPIView(APIView):
+class EntityAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Entity
 
     def get(self, request, pk=None):
         """
@@ -54,7 +57,8 @@ class EntityAPIView(APIView):
         entity.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-class DepartmentAPIView(APIView):
+class DepartmentAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Department
 
     def get(self, request, pk=None):
         if pk:
@@ -88,7 +92,8 @@ class DepartmentAPIView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
-class LocationAPIView(APIView):
+class LocationAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Location
 
     def get(self, request, pk=None):
         if pk:
@@ -122,7 +127,8 @@ class LocationAPIView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
-class TaskAPIView(APIView):
+class TaskAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Task
 
     def get(self, request, pk=None):
         if pk:
@@ -155,7 +161,8 @@ class TaskAPIView(APIView):
         task.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-class SubTaskAPIView(APIView):
+class SubTaskAPIView(VersionedMasterMixin, APIView):
+    versioned_model = SubTask
 
     def get(self, request, pk=None):
         if pk:
@@ -195,7 +202,8 @@ class SubTaskAPIView(APIView):
         subtask.is_active = False  # soft delete
         subtask.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
-class RoleAPIView(APIView):
+class RoleAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Role
 
     def get(self, request, pk=None):
         if pk:
@@ -228,7 +236,8 @@ class RoleAPIView(APIView):
         role.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class PlatformAPIView(APIView):
+class PlatformAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Platform
 
     def get(self, request, pk=None):
         if pk:
@@ -261,7 +270,8 @@ class PlatformAPIView(APIView):
         platform.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-class StatusAPIView(APIView):
+class StatusAPIView(VersionedMasterMixin, APIView):
+    versioned_model = Status
 
     def get(self, request, pk=None):
         if pk:
@@ -277,6 +287,7 @@ class StatusAPIView(APIView):
         serializer = StatusSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            status_registry.invalidate()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -285,6 +296,7 @@ class StatusAPIView(APIView):
         serializer = StatusSerializer(status_obj, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            status_registry.invalidate()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -292,6 +304,7 @@ class StatusAPIView(APIView):
         status_obj = get_object_or_404(Status, pk=pk, is_active=True)
         status_obj.is_active = False
         status_obj.save()
+        status_registry.invalidate()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 class HolidayAPIView(APIView):
@@ -385,3 +398,31 @@ class EmailTemplateAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class MasterBootstrapAPIView(VersionedMasterMixin, APIView):
+    """
+    GET /master/bootstrap/                  → all active master data, subtasks nested under tasks
+    GET /master/bootstrap/?since=<version>  → only the sections changed since that version
+    """
+    http_method_names = ['get', 'head', 'options']
+    depends_on = bootstrap.MODELS
+
+    def get(self, request):
+        versions = bootstrap.current_versions()
+        names = list(bootstrap.SECTIONS)
+
+        # Process-local counters cannot tell what other workers changed
+        since = request.query_params.get('since') if versioning.is_shared() else None
+        if since:
+            try:
+                names = bootstrap.changed_sections(bootstrap.decode_version(since), versions)
+            except ValueError:
+                return Response({"error": "Invalid since version"}, status=status.HTTP_400_BAD_REQUEST)
+
+        sections, cached = bootstrap.get_sections(names, versions)
+        response = Response({
+            "version": bootstrap.encode_version(versions),
+            "delta": bool(since),
+            **sections,
+        })
+        response['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response
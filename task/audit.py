@@ -0,0 +1,158 @@
+# audit.py
+"""
+Buffered writer for TaskListAuditLog.
+
+Views hand unsaved TaskListAuditLog instances to `record()`. In the default
+'async' mode (TASK_AUDIT_MODE) they are queued once the surrounding
+transaction commits and a background thread inserts them with bulk_create,
+so request latency no longer includes the audit inserts. 'sync' mode writes
+them immediately, inside the caller's transaction, which is what tests want.
+
+The queue is bounded (TASK_AUDIT_QUEUE_SIZE); when it is full the caller
+writes its own events synchronously instead of dropping them. Whatever is
+still queued at interpreter shutdown is flushed by an atexit hook.
+
+Build entries with `task_id` / `performed_by_id` rather than model instances:
+they are written from another thread, possibly after the task is gone.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+
+from .models import TaskList, TaskListAuditLog
+
+logger = logging.getLogger(__name__)
+
+ASYNC = 'async'
+SYNC = 'sync'
+
+_STOP = object()
+
+_lock = threading.Lock()
+_queue = None
+_worker = None
+
+
+def _mode():
+    return getattr(settings, 'TASK_AUDIT_MODE', ASYNC)
+
+
+def _batch_size():
+    return getattr(settings, 'TASK_AUDIT_BATCH_SIZE', 500)
+
+
+def record(entries):
+    """Persist a list of unsaved TaskListAuditLog instances."""
+    entries = list(entries)
+    if not entries:
+        return
+
+    if _mode() == SYNC:
+        TaskListAuditLog.objects.bulk_create(entries, batch_size=_batch_size())
+        return
+
+    # Rolled-back writes must not leave audit rows behind
+    transaction.on_commit(lambda: _enqueue(entries))
+
+
+def _enqueue(entries):
+    q = _ensure_worker()
+    for position, entry in enumerate(entries):
+        try:
+            q.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit queue full, writing %d entries inline", len(entries) - position)
+            _write(entries[position:])
+            return
+
+
+def _ensure_worker():
+    global _queue, _worker
+    if _worker is not None and _worker.is_alive():
+        return _queue
+
+    with _lock:
+        if _queue is None:
+            _queue = queue.Queue(maxsize=getattr(settings, 'TASK_AUDIT_QUEUE_SIZE', 10000))
+        # Also covers forked worker processes, which inherit a dead thread
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='task-audit-writer', daemon=True)
+            _worker.start()
+    return _queue
+
+
+def _run():
+    stopping = False
+    while not stopping:
+        item = _queue.get()
+        batch = [] if item is _STOP else [item]
+        stopping = item is _STOP
+
+        while not stopping and len(batch) < _batch_size():
+            try:
+                item = _queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+        try:
+            if batch:
+                _write(batch)
+        except Exception:
+            logger.exception("Failed to write %d audit entries", len(batch))
+        finally:
+            close_old_connections()
+
+    connection.close()
+
+
+def _write(entries):
+    try:
+        TaskListAuditLog.objects.bulk_create(entries, batch_size=_batch_size())
+    except IntegrityError:
+        # Tasks deleted in the meantime; their audit rows would have been
+        # removed by the CASCADE anyway
+        existing = set(
+            TaskList.objects.filter(
+                id__in={entry.task_id for entry in entries}
+            ).values_list('id', flat=True)
+        )
+        kept = [entry for entry in entries if entry.task_id in existing]
+        if len(kept) < len(entries):
+            logger.info("Dropped %d audit entries for deleted tasks", len(entries) - len(kept))
+        TaskListAuditLog.objects.bulk_create(kept, batch_size=_batch_size())
+
+
+def flush(timeout=10):
+    """Stop the writer thread after it has written everything queued so far."""
+    global _worker
+    with _lock:
+        worker, _worker = _worker, None
+
+    if worker is not None and worker.is_alive():
+        _queue.put(_STOP)
+        worker.join(timeout)
+
+    # Leftovers if the thread died or did not finish in time
+    if _queue is None:
+        return
+    leftovers = []
+    while True:
+        try:
+            item = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            leftovers.append(item)
+    if leftovers:
+        _write(leftovers)
+
+
+atexit.register(flush)
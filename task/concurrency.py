@@ -0,0 +1,62 @@
+# concurrency.py
+"""
+Optimistic concurrency control for single TaskList entries.
+
+Every entry carries a `version`, bumped on each write. The detail GET and the
+PUT response send it as the ETag; a client that sends it back in `If-Match`
+gets 412 Precondition Failed when someone else changed the entry in between.
+
+PUT writes with `UPDATE ... WHERE version = <version read>`
+(TaskList.save_with_version), so two approvers acting on the same entry at
+once cannot overwrite each other even without If-Match: the second write
+matches no row and is answered with 412. No row is locked while the request
+is validated.
+"""
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TaskList
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def _candidates(header):
+    tags = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def if_match_fails(request, task):
+    """True when the request has an If-Match that does not name `task`'s version."""
+    header = request.headers.get('If-Match')
+    if not header:
+        return False
+    candidates = _candidates(header)
+    return '*' not in candidates and etag(task.version) not in candidates
+
+
+def precondition_failed(pk):
+    """412 carrying the entry's current version (and ETag) for the client to reload."""
+    version = TaskList.objects.filter(pk=pk).values_list('version', flat=True).first()
+    response = Response(
+        {
+            "error": "This entry was changed by someone else. Reload it and try again.",
+            "version": version,
+        },
+        status=status.HTTP_412_PRECONDITION_FAILED
+    )
+    if version is not None:
+        response['ETag'] = etag(version)
+    return response
+
+
+def with_etag(response, version):
+    response['ETag'] = etag(version)
+    return response
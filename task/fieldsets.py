@@ -0,0 +1,138 @@
+# fieldsets.py
+"""
+Sparse fieldsets for the task list endpoints.
+
+    ?fields=date,task_name,duration    only these keys
+    ?expand=names,flags                the base keys plus these groups
+    (both)                             the union
+    (neither)                          the full payload, as before
+
+Each output key declares the model paths it reads. The queryset's
+select_related() / only() are derived from the requested keys, so a join or
+column nobody asked for is never fetched. Unknown names are a 400.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class FieldSet:
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def __init__(self, sources, groups):
+        # output key -> model paths, in output order
+        self.sources = sources
+        # expansion group -> output keys; keys in no group are the base set
+        self.groups = groups
+        grouped = {name for names in groups.values() for name in names}
+        self.base = [name for name in sources if name not in grouped]
+
+    def requested(self, params):
+        """The output keys asked for, in output order, or None for all of them."""
+        fields = _split(params.get(self.fields_param))
+        expand = _split(params.get(self.expand_param))
+        if not fields and not expand:
+            return None
+
+        unknown = [name for name in fields if name not in self.sources]
+        if unknown:
+            raise ValidationError({self.fields_param: f"Unknown field(s): {', '.join(unknown)}"})
+        unknown = [name for name in expand if name not in self.groups]
+        if unknown:
+            raise ValidationError({
+                self.expand_param: f"Unknown group(s): {', '.join(unknown)}. Use: {', '.join(self.groups)}"
+            })
+
+        wanted = set(fields or self.base)
+        for group in expand:
+            wanted.update(self.groups[group])
+        return [name for name in self.sources if name in wanted]
+
+    def apply(self, queryset, names, extra_paths=()):
+        """
+        Restrict `queryset` to the joins and columns `names` read. `extra_paths`
+        are model paths needed anyway (e.g. the pagination ordering).
+        """
+        paths = {'id', *extra_paths}
+        for name in names:
+            paths.update(self.sources[name])
+
+        joins = set()
+        for path in paths:
+            parts = path.split('__')
+            for depth in range(1, len(parts)):
+                joins.add('__'.join(parts[:depth]))
+
+        queryset = queryset.select_related(None)
+        if joins:
+            queryset = queryset.select_related(*sorted(joins))
+        return queryset.only(*sorted(paths))
+
+
+def ordering_paths(ordering):
+    return [field.lstrip('-') for field in ordering]
+
+
+# ─── TaskListSerializer ──────────────────────────────────────────────────────
+# The *_name fields sourced from `<user>.username` never render (User has no
+# username) but still load the related row, so they only need its id.
+
+TASK_LIST_FIELDS = FieldSet(
+    sources={
+        'id': ['id'],
+        'date': ['date'],
+        'user': ['user'],
+        'user_username': ['user__id'],
+        'platform': ['platform'],
+        'platform_name': ['platform__name'],
+        'task': ['task'],
+        'task_name': ['task__name'],
+        'subtask': ['subtask'],
+        'subtask_name': ['subtask__name'],
+        'bitrix_id': ['bitrix_id'],
+        'duration': ['duration'],
+        'description': ['description'],
+        'status': ['status'],
+        'status_name': ['status__name'],
+        'l1_approver': ['l1_approver'],
+        'l1_approver_name': ['l1_approver__id'],
+        'l1_approved_at': ['l1_approved_at'],
+        'l2_approver': ['l2_approver'],
+        'l2_approver_name': ['l2_approver__id'],
+        'l2_approved_at': ['l2_approved_at'],
+        'last_modified_by': ['last_modified_by'],
+        'last_modified_by_name': ['last_modified_by__id'],
+        'is_draft': ['status__name'],
+        'is_in_progress': ['status__name'],
+        'is_completed': ['status__name'],
+        'created_at': ['created_at'],
+        'updated_at': ['updated_at'],
+        'version': ['version'],
+    },
+    groups={
+        'names': ['platform_name', 'task_name', 'subtask_name', 'status_name'],
+        'users': ['user_username', 'l1_approver_name', 'l2_approver_name', 'last_modified_by_name'],
+        'flags': ['is_draft', 'is_in_progress', 'is_completed'],
+    },
+)
+
+# ─── SimpleTimeLogView ───────────────────────────────────────────────────────
+
+TIME_LOG_FIELDS = FieldSet(
+    sources={
+        'date': ['date'],
+        'platform_name': ['platform__name'],
+        'task_name': ['task__name'],
+        'subtask_name': ['subtask__name'],
+        'bitrix_id': ['bitrix_id'],
+        'duration_hours': ['duration'],
+        'created_time': ['created_at'],
+        'updated_time': ['updated_at'],
+    },
+    groups={
+        'names': ['platform_name', 'task_name', 'subtask_name'],
+    },
+)
@@ -0,0 +1,140 @@
+# idempotency.py
+"""
+`Idempotency-Key` handling for TaskList writes.
+
+A request carrying the header is recorded before the view runs, scoped to
+the user and keyed by the header value. When it finishes, the response is
+stored with it. A retry with the same key then gets:
+
+  * the stored response (body, status and ETag), with `Idempotent-Replayed:
+    true`, when the original has finished; the view (and the workflow, audit and summary writes
+    behind it) does not run again;
+  * 409 while the original is still being processed;
+  * 422 when the method, path or body differ from the original.
+
+5xx responses and exceptions are not stored, so the client can retry them.
+Keys expire after TASK_IDEMPOTENCY_TTL seconds (default one day) and are
+deleted by `manage.py purge_idempotency_keys`. A request that has been "in
+progress" for TASK_IDEMPOTENCY_LOCK_TIMEOUT seconds is assumed dead and its
+key can be reused.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def ttl():
+    return timedelta(seconds=getattr(settings, 'TASK_IDEMPOTENCY_TTL', 24 * 60 * 60))
+
+
+def lock_timeout():
+    return timedelta(seconds=getattr(settings, 'TASK_IDEMPOTENCY_LOCK_TIMEOUT', 5 * 60))
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    raw = '\n'.join([request.method, request.path, body])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _claim(user, key, digest, retry=True):
+    """Create the key row; returns (record, created)."""
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, fingerprint=digest, created_at=now), True
+    except IntegrityError:
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # Purged in between: try once more, then give up
+            if not retry:
+                raise
+            return _claim(user, key, digest, retry=False)
+
+    expired = record.created_at < now - ttl()
+    abandoned = record.status_code is None and record.created_at < now - lock_timeout()
+    if expired or abandoned:
+        # Take the key over, unless another retry did so first
+        taken = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=digest, status_code=None, response_body=None, etag=None, created_at=now
+        )
+        if taken:
+            record.fingerprint, record.status_code, record.response_body, record.created_at = digest, None, None, now
+            record.etag = None
+            return record, True
+        record.refresh_from_db()
+    return record, False
+
+
+def idempotent(view_method):
+    """Decorator for APIView write methods (post / put)."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": f"{HEADER} is limited to 255 characters"}, status=400)
+
+        digest = fingerprint(request)
+        record, created = _claim(request.user, key, digest)
+
+        if not created:
+            if record.fingerprint != digest:
+                return Response(
+                    {"error": f"{HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is still being processed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response = Response(record.response_body, status=record.status_code)
+            if record.etag:
+                response['ETag'] = record.etag
+            response[REPLAYED_HEADER] = 'true'
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        body = json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code, response_body=body, etag=response.get('ETag')
+        )
+        return response
+
+    return wrapper
+
+
+def purge(batch_size=5000):
+    """Delete expired keys in batches; returns how many were deleted."""
+    cutoff = timezone.now() - ttl()
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
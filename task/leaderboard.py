@@ -0,0 +1,142 @@
+# leaderboard.py
+"""
+Cached TopMembers leaderboard.
+
+Rankings are computed from DailyUserSummary and cached per (period, date
+range, scope) for a period-specific TTL. Every TaskList write bumps a
+generation counter (see `task.summary.record`), which changes all cache keys
+at once, so stale rankings are never served after a write. The counter and
+the rankings live in the cache shared by all workers
+(`master.versioning.get_cache`); with a process-local cache other workers
+keep their rankings until the TTL runs out.
+"""
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from dateutil.relativedelta import relativedelta
+
+from master.versioning import get_cache
+from .models import DailyUserSummary
+
+PERIODS = ('today', 'week', 'month', 'overall', 'custom')
+
+DEFAULT_TTLS = {
+    'today': 60,
+    'week': 300,
+    'month': 300,
+    'overall': 900,
+    'custom': 300,
+}
+
+# Rankings are stored up to this depth; requests slice their own `limit`
+MAX_LIMIT = 50
+
+GENERATION_KEY = 'task:leaderboard:generation'
+
+
+def period_range(period, today, start_date=None, end_date=None):
+    """
+    Return the inclusive (start, end) dates of a period, or (None, None) for
+    'overall'. Raises ValueError for unknown periods or a bad custom range.
+    """
+    if period == 'today':
+        return today, today
+    if period == 'week':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'month':
+        start = today.replace(day=1)
+        return start, start + relativedelta(months=1) - timedelta(days=1)
+    if period == 'overall':
+        return None, None
+    if period == 'custom':
+        if not start_date or not end_date:
+            raise ValueError("Custom period needs start_date and end_date")
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        if start > end:
+            raise ValueError("start_date must be on or before end_date")
+        return start, end
+    raise ValueError(f"Invalid period. Use: {' / '.join(PERIODS)}")
+
+
+def invalidate():
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key missing or evicted: start a new, never-before-used generation
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _generation():
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _ttl(period):
+    ttls = {**DEFAULT_TTLS, **getattr(settings, 'TOP_MEMBERS_CACHE_TTL', {})}
+    return ttls[period]
+
+
+def get_leaderboard(period, start, end, user=None):
+    """
+    Return (data, cache_hit). `user` restricts the ranking to that user
+    (non-staff callers); None means everyone.
+    """
+    scope = f"user:{user.id}" if user is not None else "all"
+    key = f"task:leaderboard:{_generation()}:{period}:{start}:{end}:{scope}"
+
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+
+    data = _compute(start, end, user)
+    cache.set(key, data, _ttl(period))
+    return data, False
+
+
+def _compute(start, end, user):
+    qs = DailyUserSummary.objects.all()
+    if start and end:
+        qs = qs.filter(date__range=[start, end])
+    if user is not None:
+        qs = qs.filter(user=user)
+
+    rows = qs.values(
+        'user__id',
+        'user__name',
+        'user__firstname',
+        'user__email'
+    ).annotate(
+        total_duration=Sum('total_duration', default=0),
+        task_count=Sum('entry_count')
+    ).order_by('-total_duration', 'user__id')[:MAX_LIMIT]
+
+    members = []
+    for rank, row in enumerate(rows, start=1):
+        total_hours_decimal = float(row['total_duration'] or 0)  # decimal → float
+        hours = int(total_hours_decimal)
+        minutes = int((total_hours_decimal - hours) * 60)
+
+        members.append({
+            "rank": rank,
+            "user_id": row['user__id'],
+            "name": row['user__firstname'] or row['user__name'] or "Unknown User",
+            "username": row['user__name'] or row['user__email'] or "N/A",
+            "total_time": f"{hours} hrs {minutes} mins",
+            "total_hours_decimal": f"{total_hours_decimal:.2f}",
+            "task_count": row['task_count']
+        })
+
+    return {
+        "total_members_in_system": get_user_model().objects.filter(is_active=True).count(),
+        "top_members": members,
+    }
@@ -0,0 +1,108 @@
+# list_rows.py
+"""
+Read-only TaskList list rows built from a single `.values()` projection.
+
+TaskListSerializer builds a TaskList plus its related models per row, then
+resolves eight dotted sources and the is_* status properties field by field.
+On long lists that overhead dominates. `represent(project(queryset))`
+returns the same dicts, key for key, with the status flags computed once per
+distinct status. TaskListAPIView uses it for `?mode=fast`.
+
+Serializer behaviour reproduced for byte compatibility:
+  * User has no `username`, so `user_username` is never present and the
+    `l1_approver_name` / `l2_approver_name` / `last_modified_by_name`
+    fields are always null;
+  * `subtask_name` is left out when the entry has no subtask.
+
+`manage.py benchmark_task_rows` compares both paths (and their output).
+"""
+from functools import lru_cache
+
+from .serializers import TaskListSerializer
+
+FIELDS = (
+    'id', 'date', 'user_id',
+    'platform_id', 'platform__name',
+    'task_id', 'task__name',
+    'subtask_id', 'subtask__name',
+    'bitrix_id', 'duration', 'description',
+    'status_id', 'status__name',
+    'l1_approver_id', 'l1_approved_at',
+    'l2_approver_id', 'l2_approved_at',
+    'last_modified_by_id',
+    'created_at', 'updated_at', 'version',
+)
+
+
+def project(queryset):
+    """The queryset as plain dicts; keyset pagination accepts them as they are."""
+    return queryset.values(*FIELDS)
+
+
+@lru_cache(maxsize=None)
+def _formatters():
+    # The serializer's own field instances, so dates, datetimes (timezone,
+    # 'Z' suffix) and decimals are formatted exactly as before
+    fields = TaskListSerializer().fields
+    return fields['date'].to_representation, fields['duration'].to_representation, fields['created_at'].to_representation
+
+
+def status_flags(name):
+    """(is_draft, is_in_progress, is_completed), as the TaskList properties compute them."""
+    lowered = name.lower()
+    return (
+        lowered == 'draft',
+        lowered in ['inprogress', 'in progress'],
+        lowered in ['completed', 'done', 'finished'],
+    )
+
+
+def represent(rows):
+    date_repr, duration_repr, datetime_repr = _formatters()
+    flags_by_status = {}
+
+    def dt(value):
+        return datetime_repr(value) if value is not None else None
+
+    data = []
+    for row in rows:
+        status_name = row['status__name']
+        flags = flags_by_status.get(status_name)
+        if flags is None:
+            flags = flags_by_status[status_name] = status_flags(status_name)
+
+        item = {
+            'id': row['id'],
+            'date': date_repr(row['date']),
+            'user': row['user_id'],
+            'platform': row['platform_id'],
+            'platform_name': row['platform__name'],
+            'task': row['task_id'],
+            'task_name': row['task__name'],
+            'subtask': row['subtask_id'],
+        }
+        if row['subtask_id'] is not None:
+            item['subtask_name'] = row['subtask__name']
+        item.update({
+            'bitrix_id': row['bitrix_id'],
+            'duration': duration_repr(row['duration']) if row['duration'] is not None else None,
+            'description': row['description'],
+            'status': row['status_id'],
+            'status_name': status_name,
+            'l1_approver': row['l1_approver_id'],
+            'l1_approver_name': None,
+            'l1_approved_at': dt(row['l1_approved_at']),
+            'l2_approver': row['l2_approver_id'],
+            'l2_approver_name': None,
+            'l2_approved_at': dt(row['l2_approved_at']),
+            'last_modified_by': row['last_modified_by_id'],
+            'last_modified_by_name': None,
+            'is_draft': flags[0],
+            'is_in_progress': flags[1],
+            'is_completed': flags[2],
+            'created_at': dt(row['created_at']),
+            'updated_at': dt(row['updated_at']),
+            'version': row['version'],
+        })
+        data.append(item)
+    return data
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from task import list_rows
+from task.models import TaskList
+from task.pagination import TaskListCursorPagination
+from task.serializers import TaskListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/second of TaskListSerializer and the `.values()` row builder "
+        "(task.list_rows, ?mode=fast) on the newest task entries, and check that "
+        "both render the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help="Entries per run")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per path; the fastest is reported")
+
+    def queryset(self, limit):
+        return TaskList.objects.select_related(
+            'platform', 'task', 'subtask', 'status',
+            'l1_approver', 'l2_approver', 'last_modified_by'
+        ).order_by(*TaskListCursorPagination.ordering)[:limit]
+
+    def serializer_path(self, limit):
+        return TaskListSerializer(list(self.queryset(limit)), many=True).data
+
+    def fast_path(self, limit):
+        return list_rows.represent(list(list_rows.project(self.queryset(limit))))
+
+    def measure(self, build, limit, repeat):
+        best, data = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = build(limit)
+            JSONRenderer().render(data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+    def handle(self, *args, **options):
+        limit = options['rows']
+        repeat = max(1, options['repeat'])
+
+        slow_time, slow_data = self.measure(self.serializer_path, limit, repeat)
+        fast_time, fast_data = self.measure(self.fast_path, limit, repeat)
+
+        count = len(slow_data)
+        if not count:
+            raise CommandError("No task entries to benchmark")
+
+        for label, elapsed in (("serializer", slow_time), ("values rows", fast_time)):
+            self.stdout.write(
+                f"{label:<12} {count} rows in {elapsed * 1000:8.1f} ms  ({count / elapsed:10.0f} rows/s)"
+            )
+        self.stdout.write(f"speed-up     x{slow_time / fast_time:.1f}")
+
+        renderer = JSONRenderer()
+        for slow_row, fast_row in zip(slow_data, fast_data):
+            if renderer.render(slow_row) != renderer.render(fast_row):
+                raise CommandError(
+                    f"Output differs for entry {slow_row['id']}:\n"
+                    f"  serializer:  {renderer.render(slow_row).decode()}\n"
+                    f"  values rows: {renderer.render(fast_row).decode()}"
+                )
+        self.stdout.write(self.style.SUCCESS("Output is identical"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from task import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than TASK_IDEMPOTENCY_TTL. Schedule it, e.g. hourly."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Rows deleted per statement"
+        )
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
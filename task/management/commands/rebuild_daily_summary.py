@@ -0,0 +1,61 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from task import leaderboard
+from task.models import TaskList, DailyUserSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyUserSummary rollup from task_list (optionally for a date range)."
+
+    batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--end-date', help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start_date']) if options['start_date'] else None
+            end = date.fromisoformat(options['end_date']) if options['end_date'] else None
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format")
+
+        tasks = TaskList.objects.all()
+        summaries = DailyUserSummary.objects.all()
+        if start:
+            tasks = tasks.filter(date__gte=start)
+            summaries = summaries.filter(date__gte=start)
+        if end:
+            tasks = tasks.filter(date__lte=end)
+            summaries = summaries.filter(date__lte=end)
+
+        rows = tasks.values(
+            'user_id', 'date', 'platform_id', 'task_id', 'status_id'
+        ).annotate(
+            total_duration=Sum('duration'),
+            entry_count=Count('id')
+        ).order_by()
+
+        created = 0
+        with transaction.atomic():
+            deleted, _ = summaries.delete()
+
+            batch = []
+            for row in rows.iterator(chunk_size=self.batch_size):
+                batch.append(DailyUserSummary(**row))
+                if len(batch) >= self.batch_size:
+                    DailyUserSummary.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                DailyUserSummary.objects.bulk_create(batch)
+                created += len(batch)
+
+        leaderboard.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt daily summary: removed {deleted} rows, wrote {created} rows"
+        ))
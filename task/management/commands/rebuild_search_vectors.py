@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task.models import TaskList
+from task.search import fulltext_enabled, refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute TaskList.search_vector for every row (PostgreSQL full-text search)."
+
+    batch_size = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=self.batch_size,
+            help="Rows updated per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if not fulltext_enabled():
+            raise CommandError(
+                "Full-text search is disabled (needs PostgreSQL and TASK_SEARCH_BACKEND='fulltext')"
+            )
+
+        batch_size = options['batch_size']
+        ids = TaskList.objects.order_by('id').values_list('id', flat=True)
+
+        updated = 0
+        batch = []
+        for pk in ids.iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    updated += refresh_search_vectors(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                updated += refresh_search_vectors(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search vectors for {updated} rows"))
@@ -0,0 +1,67 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from task import partitioning
+
+
+class Command(BaseCommand):
+    help = "Manage monthly range partitions of task_list (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['convert', 'create', 'detach', 'list'])
+        parser.add_argument(
+            '--months-ahead', type=int,
+            default=getattr(settings, 'TASK_PARTITION_MONTHS_AHEAD', 3),
+            help="convert/create: months to create beyond the current one"
+        )
+        parser.add_argument(
+            '--older-than', type=int,
+            help="detach: months to keep, counting back from the current month"
+        )
+        parser.add_argument('--archive-schema', help="detach: move detached partitions to this schema")
+        parser.add_argument('--drop', action='store_true', help="detach: drop detached partitions")
+
+    def handle(self, *args, **options):
+        try:
+            getattr(self, f"handle_{options['action']}")(options)
+        except partitioning.PartitioningError as e:
+            raise CommandError(str(e))
+
+    def handle_convert(self, options):
+        count = partitioning.convert(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{partitioning.TABLE} is now partitioned by month ({count} monthly partitions + default)"
+        ))
+
+    def handle_create(self, options):
+        created = partitioning.ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f"created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created"))
+
+    def handle_detach(self, options):
+        if options['older_than'] is None:
+            raise CommandError("detach needs --older-than MONTHS")
+        if options['drop'] and options['archive_schema']:
+            raise CommandError("Use either --archive-schema or --drop, not both")
+
+        before = partitioning.month_start(date.today()) - relativedelta(months=options['older_than'])
+        detached = partitioning.detach_partitions(
+            before,
+            archive_schema=options['archive_schema'],
+            drop=options['drop']
+        )
+        for name in detached:
+            self.stdout.write(f"detached {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(detached)} partitions detached (before {before})"))
+
+    def handle_list(self, options):
+        if not partitioning.is_partitioned():
+            self.stdout.write(f"{partitioning.TABLE} is not partitioned")
+            return
+        for name, lower, upper in partitioning.list_partitions():
+            bounds = f"{lower} .. {upper}" if lower else "DEFAULT"
+            self.stdout.write(f"{name:30} {bounds}")
@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    pg_trgm backs the gin_trgm_ops index on task_list.bitrix_id (0007). Needs
+    a role allowed to CREATE EXTENSION; a no-op on other backends.
+    """
+
+    dependencies = [
+        ('task', '0003_alter_tasklist_platform'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
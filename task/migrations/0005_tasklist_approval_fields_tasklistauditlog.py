@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Catches the migrations up with the approval workflow fields and the audit
+    log, which were already in the models (and in existing databases created
+    with syncdb / by hand). On such a database apply it with
+    `migrate task 0005 --fake`.
+    """
+
+    dependencies = [
+        ('task', '0004_pg_trgm_extension'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasklist',
+            name='l1_approved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='l1_approver',
+            field=models.ForeignKey(blank=True, help_text='Level 1 Approver', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='l1_approved_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='l2_approved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='l2_approver',
+            field=models.ForeignKey(blank=True, help_text='Level 2 Approver', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='l2_approved_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='last_modified_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='modified_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['l1_approver', 'status'], name='task_list_l1_appr_e32a64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['l2_approver', 'status'], name='task_list_l2_appr_bc36bd_idx'),
+        ),
+        migrations.CreateModel(
+            name='TaskListAuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete'), ('L1_APPROVE', 'L1 Approval'), ('L2_APPROVE', 'L2 Approval'), ('STATUS_CHANGE', 'Status Change')], max_length=20)),
+                ('old_values', models.JSONField(blank=True, null=True)),
+                ('new_values', models.JSONField(blank=True, null=True)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('performed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='task_audit_actions', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_logs', to='task.tasklist')),
+            ],
+            options={
+                'db_table': 'task_list_audit_log',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_summary(apps, schema_editor):
+    """Same rollup as `manage.py rebuild_daily_summary`."""
+    TaskList = apps.get_model('task', 'TaskList')
+    DailyUserSummary = apps.get_model('task', 'DailyUserSummary')
+    db = schema_editor.connection.alias
+
+    rows = TaskList.objects.using(db).values(
+        'user_id', 'date', 'platform_id', 'task_id', 'status_id'
+    ).annotate(
+        total_duration=Sum('duration'),
+        entry_count=Count('id')
+    ).order_by()
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(DailyUserSummary(**row))
+        if len(batch) >= 1000:
+            DailyUserSummary.objects.using(db).bulk_create(batch)
+            batch = []
+    DailyUserSummary.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_alter_role_entity'),
+        ('task', '0005_tasklist_approval_fields_tasklistauditlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_duration', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('platform', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='master.platform')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='master.status')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='master.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'task_daily_user_summary',
+                'indexes': [models.Index(fields=['date'], name='task_daily__date_d6f922_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date', 'platform', 'task', 'status'), name='task_daily_summary_key')],
+            },
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
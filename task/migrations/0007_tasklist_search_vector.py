@@ -0,0 +1,150 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+SEARCH_INDEXES = [
+    django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_list_search_gin'),
+    django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('bitrix_id', models.TextField())), name='gin_trgm_ops'), name='task_list_bitrix_trgm'),
+]
+
+# One statement per item: the function bodies contain semicolons
+CREATE_TRIGGERS = [
+    # The document: bitrix_id (A), task + subtask name (B), user name (C),
+    # description (D), with the 'simple' configuration task.search queries
+    """
+    CREATE OR REPLACE FUNCTION task_list_search_document(
+        p_bitrix_id text, p_description text, p_task_id bigint, p_subtask_id bigint, p_user_id bigint
+    ) RETURNS tsvector LANGUAGE sql STABLE AS $$
+        SELECT
+            setweight(to_tsvector('simple', coalesce(p_bitrix_id, '')), 'A') ||
+            setweight(to_tsvector('simple',
+                coalesce((SELECT name FROM master_task WHERE id = p_task_id), '') || ' ' ||
+                coalesce((SELECT name FROM "master_subTask" WHERE id = p_subtask_id), '')
+            ), 'B') ||
+            setweight(to_tsvector('simple', coalesce((SELECT name FROM users WHERE id = p_user_id), '')), 'C') ||
+            setweight(to_tsvector('simple', coalesce(p_description, '')), 'D')
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION task_list_search_vector_row() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := task_list_search_document(
+            NEW.bitrix_id, NEW.description, NEW.task_id, NEW.subtask_id, NEW.user_id
+        );
+        RETURN NEW;
+    END
+    $$
+    """,
+    # TG_ARGV[0]: the task_list column that references the renamed row
+    """
+    CREATE OR REPLACE FUNCTION task_list_search_vector_rename() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.name IS DISTINCT FROM OLD.name THEN
+            EXECUTE format(
+                'UPDATE task_list SET search_vector = task_list_search_document('
+                'bitrix_id, description, task_id, subtask_id, user_id) WHERE %I = $1',
+                TG_ARGV[0]
+            ) USING NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER task_list_search_vector
+        BEFORE INSERT OR UPDATE OF bitrix_id, description, task_id, subtask_id, user_id ON task_list
+        FOR EACH ROW EXECUTE FUNCTION task_list_search_vector_row()
+    """,
+    """
+    CREATE TRIGGER task_list_search_task_name
+        AFTER UPDATE OF name ON master_task
+        FOR EACH ROW EXECUTE FUNCTION task_list_search_vector_rename('task_id')
+    """,
+    """
+    CREATE TRIGGER task_list_search_subtask_name
+        AFTER UPDATE OF name ON "master_subTask"
+        FOR EACH ROW EXECUTE FUNCTION task_list_search_vector_rename('subtask_id')
+    """,
+    """
+    CREATE TRIGGER task_list_search_user_name
+        AFTER UPDATE OF name ON users
+        FOR EACH ROW EXECUTE FUNCTION task_list_search_vector_rename('user_id')
+    """,
+    """
+    UPDATE task_list
+    SET search_vector = task_list_search_document(bitrix_id, description, task_id, subtask_id, user_id)
+    """,
+]
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS task_list_search_user_name ON users',
+    'DROP TRIGGER IF EXISTS task_list_search_subtask_name ON "master_subTask"',
+    'DROP TRIGGER IF EXISTS task_list_search_task_name ON master_task',
+    'DROP TRIGGER IF EXISTS task_list_search_vector ON task_list',
+    'DROP FUNCTION IF EXISTS task_list_search_vector_rename()',
+    'DROP FUNCTION IF EXISTS task_list_search_vector_row()',
+    'DROP FUNCTION IF EXISTS task_list_search_document(text, text, bigint, bigint, bigint)',
+]
+
+
+def _postgresql(schema_editor):
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+def add_indexes(apps, schema_editor):
+    if _postgresql(schema_editor):
+        model = apps.get_model('task', 'TaskList')
+        for index in SEARCH_INDEXES:
+            schema_editor.add_index(model, index)
+
+
+def remove_indexes(apps, schema_editor):
+    if _postgresql(schema_editor):
+        model = apps.get_model('task', 'TaskList')
+        for index in SEARCH_INDEXES:
+            schema_editor.remove_index(model, index)
+
+
+def create_triggers(apps, schema_editor):
+    if _postgresql(schema_editor):
+        for statement in CREATE_TRIGGERS:
+            schema_editor.execute(statement, params=None)
+
+
+def drop_triggers(apps, schema_editor):
+    if _postgresql(schema_editor):
+        for statement in DROP_TRIGGERS:
+            schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search for task_list (task.search). The GIN indexes and the
+    triggers that keep search_vector current are PostgreSQL only; on other
+    backends the column is added unused and search keeps using icontains.
+    """
+
+    dependencies = [
+        ('master', '0005_alter_role_entity'),
+        ('task', '0006_dailyusersummary'),
+        ('users', '0004_remove_user_groups_remove_user_user_permissions_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasklist',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='tasklist', index=index) for index in SEARCH_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_indexes, remove_indexes),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
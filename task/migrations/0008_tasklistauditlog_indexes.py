@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0007_tasklist_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasklistauditlog',
+            index=models.Index(fields=['task', 'created_at'], name='task_list_a_task_id_223e5a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklistauditlog',
+            index=models.Index(fields=['created_at', 'id'], name='task_list_a_created_65313d_idx'),
+        ),
+    ]
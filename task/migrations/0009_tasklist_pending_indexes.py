@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0008_tasklistauditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(condition=models.Q(('l1_approved_at__isnull', True)), fields=['l1_approver', 'status', 'date', 'id'], name='task_list_l1_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(condition=models.Q(('l2_approved_at__isnull', True)), fields=['l2_approver', 'status', 'date', 'id'], name='task_list_l2_pending_idx'),
+        ),
+    ]
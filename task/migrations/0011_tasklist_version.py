@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+def add_version(apps, schema_editor):
+    TaskList = apps.get_model('task', 'TaskList')
+    field = TaskList._meta.get_field('version')
+    if schema_editor.connection.vendor != 'sqlite':
+        schema_editor.add_field(TaskList, field)
+        return
+    # SQLite would rebuild task_list for a NOT NULL column, recreating the
+    # PostgreSQL-only GIN indexes from 0007; ADD COLUMN with a literal
+    # default is enough here
+    definition, params = schema_editor.column_sql(TaskList, field, include_default=True)
+    schema_editor.execute(
+        'ALTER TABLE %s ADD COLUMN %s %s' % (
+            schema_editor.quote_name(TaskList._meta.db_table),
+            schema_editor.quote_name(field.column),
+            definition,
+        ),
+        params,
+    )
+
+
+def remove_version(apps, schema_editor):
+    TaskList = apps.get_model('task', 'TaskList')
+    schema_editor.remove_field(TaskList, TaskList._meta.get_field('version'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0010_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='tasklist',
+                    name='version',
+                    field=models.PositiveIntegerField(default=1, editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_version, remove_version),
+    ]
@@ -1,9 +1,14 @@
 # models.py - Update the properties
 from django.db import models
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from master.models import Platform, Status, Task, SubTask
 from users.models import User
 from django.utils import timezone
+from .querysets import TaskListQuerySet
 
 
 class BaseModel(models.Model):
@@ -17,6 +22,10 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class StaleVersion(Exception):
+    """A conditional TaskList write found a newer version than the caller read."""
+
+
 class TaskList(models.Model):
     date = models.DateField()
 
@@ -100,6 +109,16 @@ class TaskList(models.Model):
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Full-text document (description, bitrix_id, task/subtask/user names),
+    # kept current by PostgreSQL triggers (see task.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Bumped by every write through the API; optimistic concurrency control
+    # (ETag / If-Match, see `task.concurrency`)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = TaskListQuerySet.as_manager()
+
     class Meta:
         db_table = "task_list"
         ordering = ["-date", "task__name"]
@@ -110,7 +129,43 @@ class TaskList(models.Model):
             models.Index(fields=["user", "status"]),
             models.Index(fields=["l1_approver", "status"]),
             models.Index(fields=["l2_approver", "status"]),
+            # Approval inbox: only entries still waiting for that level
+            models.Index(
+                fields=["l1_approver", "status", "date", "id"],
+                condition=models.Q(l1_approved_at__isnull=True),
+                name="task_list_l1_pending_idx",
+            ),
+            models.Index(
+                fields=["l2_approver", "status", "date", "id"],
+                condition=models.Q(l2_approved_at__isnull=True),
+                name="task_list_l2_pending_idx",
+            ),
+            # PostgreSQL only: the migration skips both GIN indexes elsewhere
+            GinIndex(fields=["search_vector"], name="task_list_search_gin"),
+            # Matches the UPPER(bitrix_id::text) LIKE ... that icontains emits
+            GinIndex(
+                OpClass(Upper(Cast("bitrix_id", TextField())), name="gin_trgm_ops"),
+                name="task_list_bitrix_trgm",
+            ),
+        ]
+
+    def save_with_version(self, expected_version):
+        """
+        Write the entry with `UPDATE ... WHERE id = pk AND version =
+        expected_version`, bumping the version. Raises StaleVersion when the
+        row was changed since `expected_version` was read; nothing is locked.
+        """
+        fields = [
+            field for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in ('created_at', 'search_vector', 'version')
         ]
+        values = {field.attname: field.pre_save(self, False) for field in fields}
+        updated = TaskList.objects.filter(pk=self.pk, version=expected_version).update(
+            version=models.F('version') + 1, **values
+        )
+        if not updated:
+            raise StaleVersion(f"TaskList {self.pk} is no longer at version {expected_version}")
+        self.version = expected_version + 1
 
     def __str__(self):
         subtask_part = f" → {self.subtask.name}" if self.subtask else ""
@@ -171,6 +226,72 @@ class TaskListAuditLog(models.Model):
     class Meta:
         db_table = "task_list_audit_log"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["task", "created_at"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
     
     def __str__(self):
-        return f"{self.task.id} - {self.action} by {self.performed_by.username if self.performed_by else 'System'}"
\ No newline at end of file
+        return f"{self.task.id} - {self.action} by {self.performed_by.username if self.performed_by else 'System'}"
+
+class DailyUserSummary(models.Model):
+    """
+    Per-day rollup of TaskList rows, one row per (user, date, platform, task,
+    status). Maintained incrementally by `task.summary` on every TaskList
+    write and rebuilt with `manage.py rebuild_daily_summary`. The dashboards
+    read from here so their cost depends on the number of days, not entries.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_summaries")
+    date = models.DateField()
+    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, related_name="+")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+")
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name="+")
+
+    total_duration = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    entry_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "task_daily_user_summary"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date", "platform", "task", "status"],
+                name="task_daily_summary_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} – {self.date}: {self.total_duration}h / {self.entry_count}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's `Idempotency-Key` for a TaskList write and the response it got.
+    Rows with no status_code are requests still being processed. See
+    `task.idempotency`; purged with `manage.py purge_idempotency_keys`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    etag = models.CharField(max_length=255, null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "task_idempotency_key"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="task_idempotency_user_key"),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} → {self.status_code or 'in progress'}"
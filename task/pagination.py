@@ -0,0 +1,170 @@
+# pagination.py
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a fixed, unique ordering.
+
+    The cursor is an opaque token holding the ordering values of the last row
+    of the previous page, so every page is fetched with a
+    `WHERE (a, b, id) > (...) ORDER BY a, b, id LIMIT n` style query instead
+    of an OFFSET scan. The last ordering field must be unique (normally `id`).
+
+    Response shape:
+        {"next": <url or null>, "page_size": n, "results": [...]}
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE', 20)
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self._seek_filter(self.decode_cursor(encoded, queryset.model)))
+
+        # Fetch one extra row to know whether another page exists
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self._position(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    # ─── cursor encoding ─────────────────────────────────────────────
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, encoded, model):
+        """
+        The ordering values of a cursor, converted to the types of `model`'s
+        ordering fields. A cursor that does not decode to one valid, non-null
+        value per field is rejected with 404.
+        """
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for (path, _), value in zip(self._fields(), position):
+            if value is None or isinstance(value, (list, dict, bool)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                values.append(self._model_field(model, path).to_python(value))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    # ─── keyset helpers ──────────────────────────────────────────────
+
+    @staticmethod
+    def _model_field(model, path):
+        *relations, name = path.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def _fields(self):
+        return [(f.lstrip('-'), f.startswith('-')) for f in self.ordering]
+
+    def _position(self, row):
+        position = []
+        for field, _ in self._fields():
+            if isinstance(row, dict):
+                value = row.get(field)
+            else:
+                value = row
+                for attr in field.split('__'):
+                    value = getattr(value, attr, None)
+                    if value is None:
+                        break
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def _seek_filter(self, position):
+        """
+        Expand the row comparison into OR-ed prefix conditions so it works
+        with mixed ASC/DESC orderings:
+            (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for (field, descending), value in zip(self._fields(), position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+            equal_prefix &= Q(**{field: value})
+        return condition
+
+
+class TaskListCursorPagination(KeysetPagination):
+    """
+    Default listing order of TaskListAPIView; `id` is the unique tie-breaker.
+    """
+    ordering = ('-date', 'task__name', 'id')
+
+
+class ApprovalInboxPagination(KeysetPagination):
+    """
+    Oldest pending entries first, matching the partial approver indexes.
+    """
+    ordering = ('date', 'id')
+
+
+class TaskListAuditLogCursorPagination(KeysetPagination):
+    """
+    Newest audit entries first; backed by the (created_at, id) index.
+    """
+    ordering = ('-created_at', '-id')
+    max_page_size = 500
@@ -0,0 +1,265 @@
+# partitioning.py
+"""
+Monthly range partitioning of task_list (PostgreSQL only).
+
+    manage.py task_partitions convert        one-off: rebuild task_list as a
+                                             partitioned table
+    manage.py task_partitions create         create the next months ahead of
+                                             time (schedule monthly)
+    manage.py task_partitions detach --older-than 24 [--archive-schema archive | --drop]
+    manage.py task_partitions list
+
+Each month lives in `task_list_yYYYYmMM`; rows outside every partition land in
+`task_list_default` and are moved out when their month is created. Queries
+that filter on `date` (every list / export / dashboard filter) are pruned to
+the matching partitions, and VACUUM / REINDEX work per month.
+
+Limitations of the partitioned layout:
+  * The primary key becomes (id, date). `id` still comes from the identity
+    sequence and stays unique in practice, but PostgreSQL no longer enforces
+    it on its own, and unique indexes must include `date`.
+  * The search_vector trigger is re-created on the partitioned table, which
+    needs PostgreSQL 13 or later (BEFORE ROW triggers on partitioned tables).
+  * Foreign keys *to* task_list (task_list_audit_log.task_id) are dropped,
+    since they would have to reference (id, date). Django's on_delete still
+    cascades in Python, so deleting a task still deletes its audit rows.
+  * `convert` holds an ACCESS EXCLUSIVE lock while it copies the table; run
+    it in a maintenance window.
+  * Detached months disappear from the API. DailyUserSummary is not
+    touched, so the dashboards keep their history.
+"""
+import re
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+
+from .models import TaskList
+
+TABLE = TaskList._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+LEGACY_TABLE = f'{TABLE}_legacy'
+
+_bound_re = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _months(first, last):
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month += relativedelta(months=1)
+
+
+def _check_backend():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Partitioning is only supported on PostgreSQL")
+
+
+def is_partitioned():
+    _check_backend()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """[(name, first_day, day_after_last)]; bounds are None for the default partition."""
+    _check_backend()
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+        """, [TABLE])
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _bound_re.search(bound or '')
+        if match:
+            partitions.append((name, date.fromisoformat(match[1]), date.fromisoformat(match[2])))
+        else:
+            partitions.append((name, None, None))
+    return partitions
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def _create_partition(cursor, month):
+    name = partition_name(month)
+    if _table_exists(cursor, name):
+        return False
+
+    lower, upper = month, month + relativedelta(months=1)
+    create_sql = (
+        f"CREATE TABLE {_qn(name)} PARTITION OF {_qn(TABLE)} "
+        f"FOR VALUES FROM (%s) TO (%s)"
+    )
+
+    stranded = False
+    if _table_exists(cursor, DEFAULT_PARTITION):
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {_qn(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s)",
+            [lower, upper]
+        )
+        stranded = cursor.fetchone()[0]
+
+    if not stranded:
+        cursor.execute(create_sql, [lower, upper])
+        return True
+
+    # The new range would overlap rows already sitting in the default
+    # partition: move them into the new partition while it is detached
+    cursor.execute(f"ALTER TABLE {_qn(TABLE)} DETACH PARTITION {_qn(DEFAULT_PARTITION)}")
+    cursor.execute(create_sql, [lower, upper])
+    cursor.execute(
+        f"INSERT INTO {_qn(TABLE)} SELECT * FROM {_qn(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s",
+        [lower, upper]
+    )
+    cursor.execute(
+        f"DELETE FROM {_qn(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s",
+        [lower, upper]
+    )
+    cursor.execute(f"ALTER TABLE {_qn(TABLE)} ATTACH PARTITION {_qn(DEFAULT_PARTITION)} DEFAULT")
+    return True
+
+
+def ensure_partitions(months_ahead, today=None):
+    """Create partitions from the current month up to `months_ahead` months later."""
+    if not is_partitioned():
+        raise PartitioningError(f"{TABLE} is not partitioned yet; run `task_partitions convert`")
+
+    first = month_start(today or date.today())
+    created = []
+    for month in _months(first, first + relativedelta(months=months_ahead)):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if _create_partition(cursor, month):
+                created.append(partition_name(month))
+    return created
+
+
+def convert(months_ahead, today=None):
+    """
+    Rebuild task_list as a table partitioned by month, keeping its columns,
+    indexes, triggers, outgoing foreign keys and identity sequence. Returns
+    the number of monthly partitions created.
+    """
+    if is_partitioned():
+        raise PartitioningError(f"{TABLE} is already partitioned")
+
+    today = today or date.today()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {_qn(TABLE)} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute("""
+            SELECT conrelid::regclass::text, conname FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = to_regclass(%s)
+        """, [TABLE])
+        for table, name in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {_qn(name)}")
+
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE contype = 'f' AND conrelid = to_regclass(%s)
+        """, [TABLE])
+        foreign_keys = cursor.fetchall()
+
+        # Non-unique secondary indexes; the definitions name `task_list`, so
+        # they can be replayed once the old table is gone
+        cursor.execute("""
+            SELECT i.indexdef FROM pg_indexes i
+            JOIN pg_index x ON x.indexrelid = to_regclass(quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))
+            WHERE i.schemaname = current_schema() AND i.tablename = %s AND NOT x.indisunique
+        """, [TABLE])
+        indexes = [row[0] for row in cursor.fetchall()]
+
+        # User triggers (the search_vector maintenance, see task.search)
+        cursor.execute("""
+            SELECT pg_get_triggerdef(oid) FROM pg_trigger
+            WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal
+        """, [TABLE])
+        triggers = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"SELECT min(date) FROM {_qn(TABLE)}")
+        first = cursor.fetchone()[0] or today
+
+        cursor.execute(f"ALTER TABLE {_qn(TABLE)} RENAME TO {_qn(LEGACY_TABLE)}")
+        cursor.execute(
+            f"CREATE TABLE {_qn(TABLE)} (LIKE {_qn(LEGACY_TABLE)} "
+            f"INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE INCLUDING COMMENTS) "
+            f"PARTITION BY RANGE (date)"
+        )
+
+        months = list(_months(first, month_start(today) + relativedelta(months=months_ahead)))
+        for month in months:
+            _create_partition(cursor, month)
+        cursor.execute(f"CREATE TABLE {_qn(DEFAULT_PARTITION)} PARTITION OF {_qn(TABLE)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {_qn(TABLE)} SELECT * FROM {_qn(LEGACY_TABLE)}")
+        cursor.execute(f"DROP TABLE {_qn(LEGACY_TABLE)}")
+
+        cursor.execute(f"ALTER TABLE {_qn(TABLE)} ADD CONSTRAINT {_qn(TABLE + '_pkey')} PRIMARY KEY (id, date)")
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {_qn(TABLE)} ADD CONSTRAINT {_qn(name)} {definition}")
+        for definition in triggers:
+            cursor.execute(definition)
+
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"coalesce((SELECT max(id) FROM {_qn(TABLE)}), 0) + 1, false)",
+            [TABLE]
+        )
+
+    return len(months)
+
+
+def detach_partitions(before, archive_schema=None, drop=False):
+    """
+    Detach every monthly partition that ends on or before `before`. Detached
+    tables are moved to `archive_schema`, dropped, or left in place as plain
+    tables. Returns their names.
+    """
+    if not is_partitioned():
+        raise PartitioningError(f"{TABLE} is not partitioned")
+
+    detached = []
+    for name, _, upper in list_partitions():
+        if upper is None or upper > before:
+            continue
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {_qn(TABLE)} DETACH PARTITION {_qn(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {_qn(name)}")
+            elif archive_schema:
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {_qn(archive_schema)}")
+                cursor.execute(f"ALTER TABLE {_qn(name)} SET SCHEMA {_qn(archive_schema)}")
+        detached.append(name)
+    return detached
@@ -0,0 +1,47 @@
+# querysets.py
+"""
+Shared TaskList query building.
+
+`users` is a 100+ column table (tokens, layout preferences, legacy GLPI
+settings). Every User join made for task entries goes through
+`with_related()`, which loads only USER_FIELDS of each related user, and
+leaves out TaskList.search_vector, which nothing renders.
+"""
+from django.db import models
+
+# What task payloads need from a related user
+USER_FIELDS = ('id', 'name', 'firstname')
+
+# TaskList foreign keys to User
+USER_RELATIONS = ('user', 'l1_approver', 'l2_approver', 'last_modified_by')
+
+MASTER_RELATIONS = ('platform', 'task', 'subtask', 'status')
+
+# TaskList columns never needed for display
+DEFERRED_FIELDS = ('search_vector',)
+
+
+class TaskListQuerySet(models.QuerySet):
+    def with_related(self, users=USER_RELATIONS, masters=MASTER_RELATIONS):
+        """
+        select_related() the master tables and the `users` relations, with
+        every TaskList column except DEFERRED_FIELDS and only USER_FIELDS of
+        each related user.
+        """
+        columns = [
+            field.name for field in self.model._meta.concrete_fields
+            if field.name not in DEFERRED_FIELDS
+        ]
+        user_columns = [f"{relation}__{field}" for relation in users for field in USER_FIELDS]
+        master_columns = [
+            f"{relation}__{field.name}"
+            for relation in masters
+            for field in self.model._meta.get_field(relation).related_model._meta.concrete_fields
+        ]
+        return self.select_related(*masters, *users).only(*columns, *master_columns, *user_columns)
+
+    def visible_to(self, user):
+        """Entries `user` may see: everything for staff, their own otherwise."""
+        if user.is_staff:
+            return self
+        return self.filter(user_id=user.id)
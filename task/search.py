@@ -0,0 +1,100 @@
+# search.py
+"""
+Search over TaskList rows.
+
+On PostgreSQL (TASK_SEARCH_BACKEND = 'fulltext', the default) `search` is
+answered from `TaskList.search_vector`, a tsvector of the description,
+bitrix_id, task / subtask name and user name backed by a GIN index, plus a
+trigram-indexed substring match on bitrix_id. Each word of the term is
+matched as a prefix, so "deplo" finds "deployment".
+
+Any other backend (or TASK_SEARCH_BACKEND = 'icontains') keeps the original
+OR of icontains lookups.
+
+The vector is maintained by triggers installed by migration 0007: task_list
+rows get theirs computed in the same INSERT / UPDATE (bulk_create and
+QuerySet.update() included), and renaming a task, subtask or user refreshes
+the rows that mention it. Both go through the SQL function
+`task_list_search_document()`, which `manage.py rebuild_search_vectors`
+reuses.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models import Q
+
+from .models import TaskList
+
+# 'simple' = no stemming or stop words; the text is mostly names and IDs.
+# task_list_search_document() uses the same configuration.
+CONFIG = 'simple'
+
+_word_re = re.compile(r'\w+')
+
+
+def fulltext_enabled():
+    return (
+        connection.vendor == 'postgresql'
+        and getattr(settings, 'TASK_SEARCH_BACKEND', 'fulltext') == 'fulltext'
+    )
+
+
+def build_query(term):
+    """`foo bar` -> `foo:* & bar:*`, or None if the term has no words."""
+    words = _word_re.findall(term.lower())
+    if not words:
+        return None
+    raw = ' & '.join(f"{word}:*" for word in words)
+    return SearchQuery(raw, search_type='raw', config=CONFIG)
+
+
+def apply_search(queryset, term, include_user=True):
+    """Filter a TaskList queryset by a free-text `search` term."""
+    term = term.strip()
+    if not term:
+        return queryset
+
+    if fulltext_enabled():
+        condition = Q(bitrix_id__icontains=term)
+        query = build_query(term)
+        if query is not None:
+            condition |= Q(search_vector=query)
+        return queryset.filter(condition)
+
+    condition = (
+        Q(description__icontains=term) |
+        Q(bitrix_id__icontains=term) |
+        Q(task__name__icontains=term) |
+        Q(subtask__name__icontains=term)
+    )
+    if include_user:
+        condition |= Q(user__name__icontains=term)
+    return queryset.filter(condition)
+
+
+def refresh_search_vectors(ids=None):
+    """
+    Recompute `search_vector` for the given TaskList ids (all rows if None).
+    No-op when full-text search is not in use.
+    """
+    if not fulltext_enabled():
+        return 0
+    if ids is not None:
+        ids = [pk for pk in ids if pk is not None]
+        if not ids:
+            return 0
+
+    sql = f"""
+        UPDATE {connection.ops.quote_name(TaskList._meta.db_table)}
+        SET search_vector = task_list_search_document(bitrix_id, description, task_id, subtask_id, user_id)
+    """
+    params = []
+    if ids is not None:
+        sql += " WHERE id = ANY(%s)"
+        params.append(list(ids))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
@@ -1,11 +1,12 @@
 # serializers.py
 from rest_framework import serializers
 from .models import TaskList, TaskListAuditLog, Status
-from django.utils import timezone
+from master.models import Platform, Task, SubTask
+from master import status_registry
 
 
 class TaskListAuditLogSerializer(serializers.ModelSerializer):
-    performed_by_username = serializers.CharField(source='performed_by.username', read_only=True)
+    performed_by_username = serializers.CharField(source='performed_by.name', read_only=True, allow_null=True)
     
     class Meta:
         model = TaskListAuditLog
@@ -171,11 +172,11 @@ class TaskListSerializer(serializers.ModelSerializer):
             'last_modified_by', 'last_modified_by_name',
             'is_draft', 'is_in_progress', 'is_completed',
             'action', 'remarks',
-            'created_at', 'updated_at',
+            'created_at', 'updated_at', 'version',
         ]
 
         read_only_fields = [
-            'id', 'user', 'user_username', 'created_at', 'updated_at',
+            'id', 'user', 'user_username', 'created_at', 'updated_at', 'version',
             'platform_name', 'task_name', 'subtask_name', 'status_name',
             'l1_approver_name', 'l2_approver_name', 'last_modified_by_name',
             'l1_approved_at', 'l2_approved_at',
@@ -184,6 +185,13 @@ class TaskListSerializer(serializers.ModelSerializer):
             'l1_approver', 'l2_approver',
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        # `fields`: output keys to keep (sparse fieldsets, see task.fieldsets)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def validate(self, data):
         task    = data.get('task')
         subtask = data.get('subtask')
@@ -206,37 +214,129 @@ class TaskListSerializer(serializers.ModelSerializer):
 
         # Default to Draft if no status provided
         if 'status' not in validated_data:
-            draft = Status.objects.filter(name__iexact='draft').first()
+            draft = status_registry.draft()
             if draft:
                 validated_data['status'] = draft
 
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
-        action = validated_data.pop('action', None)
-        remarks = validated_data.pop('remarks', '')
-
-        updated_instance = super().update(instance, validated_data)
-
-        # Log approval or update
-        if action in ['L1_APPROVE', 'L2_APPROVE']:
-            log_action = f"{action} - Approved"
-        else:
-            log_action = 'UPDATE'
-
-        self._log_action(updated_instance, log_action, remarks)
-
-        return updated_instance
-
-    def _log_action(self, instance, action, remarks):
-        request = self.context.get('request')
-        if request:
-            old_status = instance.status.name if instance.status else None
-            TaskListAuditLog.objects.create(
-                task=instance,
-                action=action,
-                performed_by=request.user,
-                remarks=remarks,
-                old_values={'status': old_status},
-                new_values={'status': instance.status.name if instance.status else None}
-            )
\ No newline at end of file
+        # Approval fields are handled by the view, which also writes the
+        # (single) audit entry for this update
+        validated_data.pop('action', None)
+        validated_data.pop('remarks', None)
+
+        # save(expected_version=n): conditional write, see task.concurrency
+        expected_version = validated_data.pop('expected_version', None)
+        if expected_version is None:
+            return super().update(instance, validated_data)
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save_with_version(expected_version)
+        return instance
+
+# ─── Bulk import ────────────────────────────────────────────────────────────
+# Rows are validated field-by-field without touching the database; foreign keys
+# are then resolved for the whole batch with one query per master table.
+
+class TaskListImportListSerializer(serializers.ListSerializer):
+    # row key -> (model, human label)
+    fk_tables = {
+        'platform': (Platform, 'platform'),
+        'task': (Task, 'task'),
+        'subtask': (SubTask, 'subtask'),
+        'status': (Status, 'status'),
+    }
+
+    def to_internal_value(self, data):
+        rows = super().to_internal_value(data)
+
+        lookups = {}
+        for key, (model, _) in self.fk_tables.items():
+            ids = {row[key] for row in rows if row.get(key) is not None}
+            if model is Status:
+                lookups[key] = {pk: status_registry.get_by_id(pk) for pk in ids}
+            else:
+                lookups[key] = model.objects.in_bulk(ids) if ids else {}
+
+        default_status = status_registry.draft()
+
+        errors = []
+        has_errors = False
+        for row in rows:
+            row_errors = {}
+            for key, (_, label) in self.fk_tables.items():
+                pk = row.get(key)
+                if pk is None:
+                    continue
+                obj = lookups[key].get(pk)
+                if obj is None:
+                    row_errors[key] = [f'Invalid pk "{pk}" - {label} does not exist.']
+                else:
+                    row[key] = obj
+
+            if row.get('status') is None:
+                if default_status is None:
+                    row_errors['status'] = ['No status provided and no Draft status is configured.']
+                else:
+                    row['status'] = default_status
+
+            subtask = row.get('subtask')
+            if subtask and not row_errors and subtask.task_id != row['task'].id:
+                row_errors['subtask'] = ['Selected subtask does not belong to selected task']
+
+            has_errors = has_errors or bool(row_errors)
+            errors.append(row_errors)
+
+        if has_errors:
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        # Callers wrap this (and the audit rows) in a single transaction
+        creator = self.context['request'].user
+        l1_approver = getattr(creator, 'user_id_supervisor', None) or None
+
+        tasks = [
+            TaskList(
+                user=creator,
+                last_modified_by=creator,
+                l1_approver=l1_approver,
+                **row
+            )
+            for row in validated_data
+        ]
+
+        TaskList.objects.bulk_create(tasks, batch_size=self.child.batch_size)
+        return tasks
+
+
+class TaskListImportRowSerializer(serializers.Serializer):
+    batch_size = 500
+
+    date = serializers.DateField()
+    platform = serializers.IntegerField()
+    task = serializers.IntegerField()
+    subtask = serializers.IntegerField(required=False, allow_null=True)
+    status = serializers.IntegerField(required=False, allow_null=True)
+    bitrix_id = serializers.CharField(max_length=50, required=False, allow_null=True, allow_blank=True)
+    duration = serializers.DecimalField(max_digits=6, decimal_places=2, required=False, default=0)
+    description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    class Meta:
+        list_serializer_class = TaskListImportListSerializer
+
+    @staticmethod
+    def audit_values(task):
+        """Snapshot of an imported row for the CREATE audit entry."""
+        return {
+            'date': task.date.isoformat(),
+            'platform': task.platform_id,
+            'task': task.task_id,
+            'subtask': task.subtask_id,
+            'status': task.status_id,
+            'bitrix_id': task.bitrix_id or "",
+            'duration': str(task.duration),
+            'description': task.description or "",
+        }
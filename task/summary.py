@@ -0,0 +1,85 @@
+# summary.py
+"""
+Incremental maintenance of DailyUserSummary.
+
+Writers take a `snapshot()` of each TaskList row before and/or after the
+change and hand them to `record()`, which folds them into per-key deltas and
+applies all of them with a single INSERT ... ON CONFLICT DO UPDATE statement.
+Call it inside the same transaction as the TaskList write.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import leaderboard
+from .models import DailyUserSummary
+
+KEY_FIELDS = ('user_id', 'date', 'platform_id', 'task_id', 'status_id')
+
+UPSERT_BATCH_SIZE = 500
+
+
+def snapshot(task):
+    """(key, duration) of a TaskList row as it is right now."""
+    key = tuple(getattr(task, field) for field in KEY_FIELDS)
+    return key, Decimal(task.duration or 0)
+
+
+def record(added=(), removed=()):
+    """
+    Apply snapshots of created (`added`) and deleted (`removed`) rows. An
+    update is recorded as its old snapshot removed and its new one added.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for key, duration in added:
+        deltas[key][0] += duration
+        deltas[key][1] += 1
+    for key, duration in removed:
+        deltas[key][0] -= duration
+        deltas[key][1] -= 1
+
+    changes = sorted(
+        (key, duration, count)
+        for key, (duration, count) in deltas.items()
+        if duration or count
+    )
+    if not changes:
+        return
+
+    # Sorted keys keep concurrent writers locking rows in the same order
+    for start in range(0, len(changes), UPSERT_BATCH_SIZE):
+        _upsert(changes[start:start + UPSERT_BATCH_SIZE])
+
+    transaction.on_commit(leaderboard.invalidate)
+
+    if any(count < 0 for _, _, count in changes):
+        DailyUserSummary.objects.filter(
+            user_id__in={key[0] for key, _, _ in changes},
+            date__in={key[1] for key, _, _ in changes},
+            entry_count__lte=0,
+        ).delete()
+
+
+def _upsert(changes):
+    table = connection.ops.quote_name(DailyUserSummary._meta.db_table)
+    now = timezone.now()
+
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(changes))
+    params = []
+    for key, duration, count in changes:
+        params.extend(key)
+        params.extend([duration, count, now])
+
+    sql = (
+        f"INSERT INTO {table} "
+        f"(user_id, date, platform_id, task_id, status_id, total_duration, entry_count, updated_at) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT (user_id, date, platform_id, task_id, status_id) DO UPDATE SET "
+        f"total_duration = {table}.total_duration + EXCLUDED.total_duration, "
+        f"entry_count = {table}.entry_count + EXCLUDED.entry_count, "
+        f"updated_at = EXCLUDED.updated_at"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
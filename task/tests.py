@@ -1,3 +1,402 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from master import status_registry, versioning
+from master.models import Platform, Status, Task
+from users.models import User
+from . import idempotency, leaderboard
+from .models import DailyUserSummary, IdempotencyKey, TaskList, TaskListAuditLog
+from .pagination import TaskListCursorPagination
+from .views import TaskListAPIView
+
+
+@override_settings(TASK_AUDIT_MODE='sync')
+class TaskListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="alice@example.com")
+        cls.approver = User.objects.create(name="boss@example.com", is_staff=True)
+        cls.platform = Platform.objects.create(name="Web", created_by=1, modified_by=1)
+        cls.task = Task.objects.create(name="Build", created_by=1, modified_by=1)
+        cls.draft = Status.objects.create(name="Draft", created_by=1, modified_by=1)
+        cls.in_progress = Status.objects.create(name="In Progress", created_by=1, modified_by=1)
+        cls.completed = Status.objects.create(name="Completed", created_by=1, modified_by=1)
+
+    def setUp(self):
+        status_registry.invalidate()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def entry(self, **kwargs):
+        values = {
+            'date': date(2026, 1, 5), 'user': self.user, 'platform': self.platform,
+            'task': self.task, 'status': self.draft, 'duration': Decimal('1.00'),
+            'l1_approver': self.approver,
+        }
+        values.update(kwargs)
+        return TaskList.objects.create(**values)
+
+    def summary(self):
+        return {
+            (row.status_id, row.date): (row.total_duration, row.entry_count)
+            for row in DailyUserSummary.objects.filter(user=self.user)
+        }
+
+
+class DailySummaryTests(TaskListTestCase):
+    def test_create_update_approve_and_delete_keep_the_summary_in_step(self):
+        client = self.client_for(self.user)
+        day = date(2026, 1, 5)
+
+        response = client.post("/task/createTask/", [
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id,
+             'status': self.draft.id, 'duration': '1.50'},
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id,
+             'status': self.draft.id, 'duration': '2.00'},
+        ], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary(), {(self.draft.id, day): (Decimal('3.50'), 2)})
+
+        first, second = (row['id'] for row in response.data)
+        response = client.put(f"/task/taskslist/{first}/", {'duration': '4.00'}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary(), {(self.draft.id, day): (Decimal('6.00'), 2)})
+
+        response = self.client_for(self.approver).put(
+            f"/task/taskslist/{first}/", {'action': 'L1_APPROVE'}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary(), {
+            (self.draft.id, day): (Decimal('2.00'), 1),
+            (self.in_progress.id, day): (Decimal('4.00'), 1),
+        })
+
+        response = client.delete(f"/task/taskslist/{second}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.summary(), {(self.in_progress.id, day): (Decimal('4.00'), 1)})
+
+    def test_rejected_write_leaves_the_summary_alone(self):
+        entry = self.entry()
+        DailyUserSummary.objects.create(
+            user=self.user, date=entry.date, platform=self.platform, task=self.task,
+            status=self.draft, total_duration=Decimal('1.00'), entry_count=1,
+        )
+        response = self.client_for(self.user).put(
+            f"/task/taskslist/{entry.id}/", {'duration': 'not a number'}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.summary(), {(self.draft.id, entry.date): (Decimal('1.00'), 1)})
+
+
+class ServerTimingTests(TaskListTestCase):
+    def test_header_is_sent_to_staff_only(self):
+        self.entry()
+        response = self.client_for(self.user).get("/task/taskslist/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+        response = self.client_for(self.approver).get("/task/taskslist/")
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_header_can_be_turned_off(self):
+        response = self.client_for(self.approver).get("/task/taskslist/")
+        self.assertNotIn("Server-Timing", response)
+
+
+class ApprovalInboxTests(TaskListTestCase):
+    url = "/task/tasks/approvals/inbox/"
+
+    def test_counts_follow_the_query_string_filters(self):
+        self.entry()
+        self.entry(date=date(2026, 2, 2))
+        self.entry(l1_approver=self.user)
+
+        response = self.client_for(self.approver).get(self.url, {'start_date': '2026-02-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['counts']['total'], 1)
+        self.assertEqual(response.data['counts']['by_level'], [
+            {'level': 'L1', 'status': 'Draft', 'count': 1},
+            {'level': 'L2', 'status': 'In Progress', 'count': 0},
+        ])
+
+
+class IdempotencyTests(TaskListTestCase):
+    def create(self, key, duration='1.50'):
+        return self.client_for(self.user).post("/task/createTask/", [
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id,
+             'status': self.draft.id, 'duration': duration},
+        ], format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.create("k1")
+        self.assertEqual(first.status_code, 201)
+
+        retry = self.create("k1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(TaskList.objects.count(), 1)
+
+    def test_replayed_update_keeps_the_etag(self):
+        entry = self.entry()
+        client = self.client_for(self.user)
+        first = client.put(f"/task/taskslist/{entry.id}/", {'duration': '2.00'}, format="json",
+                           HTTP_IDEMPOTENCY_KEY="k1")
+        retry = client.put(f"/task/taskslist/{entry.id}/", {'duration': '2.00'}, format="json",
+                           HTTP_IDEMPOTENCY_KEY="k1")
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry["ETag"], first["ETag"])
+        entry.refresh_from_db()
+        self.assertEqual(entry.version, 2)
+
+    def test_same_key_with_a_different_body_is_rejected(self):
+        self.create("k1")
+        response = self.create("k1", duration='2.00')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(TaskList.objects.count(), 1)
+
+    def test_retry_while_the_original_is_running_conflicts(self):
+        self.create("k1")
+        IdempotencyKey.objects.update(status_code=None, response_body=None)
+        response = self.create("k1")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(TaskList.objects.count(), 1)
+
+    def test_claim_retries_once_then_raises(self):
+        with mock.patch.object(IdempotencyKey.objects, 'create', side_effect=IntegrityError) as create:
+            with self.assertRaises(IntegrityError):
+                idempotency._claim(self.user, "k1", "digest")
+        self.assertEqual(create.call_count, 2)
+
+
+class OptimisticConcurrencyTests(TaskListTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task_entry = self.entry()
+        self.url = f"/task/taskslist/{self.task_entry.id}/"
+        self.client = self.client_for(self.user)
+
+    def put(self, data, **headers):
+        return self.client.put(self.url, data, format="json", **headers)
+
+    def test_detail_and_update_send_the_version_as_etag(self):
+        self.assertEqual(self.client.get(self.url)["ETag"], '"1"')
+        response = self.put({'duration': '2.00'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_stale_if_match_is_answered_with_412(self):
+        TaskList.objects.filter(pk=self.task_entry.pk).update(version=F('version') + 1)
+        response = self.put({'duration': '2.00'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response["ETag"], '"2"')
+        self.task_entry.refresh_from_db()
+        self.assertEqual(self.task_entry.duration, Decimal('1.00'))
+
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(TaskList.objects.filter(pk=self.task_entry.pk).exists())
+
+    def test_write_that_lands_after_the_read_is_rejected(self):
+        get_object = TaskListAPIView.get_object
+
+        def read_then_race(view, pk):
+            task = get_object(view, pk)
+            # Another approver saves the entry while this request is validated
+            TaskList.objects.filter(pk=pk).update(version=F('version') + 1, duration=Decimal('3.00'))
+            return task
+
+        with mock.patch.object(TaskListAPIView, 'get_object', read_then_race):
+            response = self.put({'duration': '2.00'})
+        self.assertEqual(response.status_code, 412)
+        self.task_entry.refresh_from_db()
+        self.assertEqual((self.task_entry.duration, self.task_entry.version), (Decimal('3.00'), 2))
+
+
+class PaginationTests(TaskListTestCase):
+    url = "/task/taskslist/"
+
+    def setUp(self):
+        super().setUp()
+        other = Task.objects.create(name="Alpha", created_by=1, modified_by=1)
+        for day in (5, 5, 6, 7, 7):
+            self.entry(date=date(2026, 1, day))
+            self.entry(date=date(2026, 1, day), task=other)
+        self.client = self.client_for(self.user)
+
+    def walk(self, **params):
+        ids, response = [], self.client.get(self.url, {'page_size': 3, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_row_once_in_listing_order(self):
+        expected = list(
+            TaskList.objects.order_by(*TaskListCursorPagination.ordering).values_list('id', flat=True)
+        )
+        self.assertEqual(self.walk(), expected)
+        self.assertEqual(self.walk(mode='fast'), expected)
+
+    def test_fast_mode_renders_the_same_rows(self):
+        params = {'page_size': 4, 'fields': 'id,date,duration,status,version'}
+        serialized = self.client.get(self.url, params).json()
+        fast = self.client.get(self.url, {**params, 'mode': 'fast'}).json()
+        self.assertEqual(fast['results'], serialized['results'])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nonsense'}).status_code, 404)
+
+    def test_tampered_cursor_is_rejected(self):
+        paginator = TaskListCursorPagination()
+        for position in (["x", "Build", 1], [None, "Build", 1], ["2026-01-05", "Build", "abc"],
+                         ["2026-01-05", ["Build"], 1], ["2026-01-05", "Build"]):
+            response = self.client.get(self.url, {'cursor': paginator.encode_cursor(position)})
+            self.assertEqual(response.status_code, 404, position)
+
+    def test_cursor_values_are_converted_to_the_field_types(self):
+        paginator = TaskListCursorPagination()
+        self.assertEqual(
+            paginator.decode_cursor(paginator.encode_cursor(["2026-01-06", "Build", "7"]), TaskList),
+            [date(2026, 1, 6), "Build", 7],
+        )
+
+
+class BulkImportTests(TaskListTestCase):
+    url = "/task/tasks/bulk-import/"
+
+    def test_imports_every_row_with_audit_and_summary(self):
+        response = self.client_for(self.user).post(self.url, [
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id, 'duration': '1.50'},
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id, 'duration': '2.00',
+             'status': self.in_progress.id},
+        ], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 2)
+
+        tasks = TaskList.objects.filter(id__in=response.data['ids']).order_by('id')
+        self.assertEqual([task.status_id for task in tasks], [self.draft.id, self.in_progress.id])
+        self.assertEqual(TaskListAuditLog.objects.filter(action='CREATE', task__in=tasks).count(), 2)
+        self.assertEqual(self.summary(), {
+            (self.draft.id, date(2026, 1, 5)): (Decimal('1.50'), 1),
+            (self.in_progress.id, date(2026, 1, 5)): (Decimal('2.00'), 1),
+        })
+
+    def test_one_invalid_row_rejects_the_batch(self):
+        response = self.client_for(self.user).post(self.url, [
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id},
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': 999999},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('task', response.data[1])
+        self.assertFalse(TaskList.objects.exists())
+
+    def test_staff_cannot_import(self):
+        response = self.client_for(self.approver).post(self.url, [
+            {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id},
+        ], format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkApprovalTests(TaskListTestCase):
+    url = "/task/tasks/approvals/bulk/"
+
+    def test_listed_ids_each_get_a_result(self):
+        pending = self.entry()
+        approved = self.entry(status=self.in_progress, l1_approved_at=timezone.now())
+        foreign = self.entry(l1_approver=User.objects.create(name="other@example.com"))
+
+        response = self.client_for(self.approver).post(self.url, {
+            'action': 'L1_APPROVE', 'ids': [pending.id, approved.id, foreign.id, 999999],
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['approved'], 1)
+        self.assertEqual([row['result'] for row in response.data['results']],
+                         ['approved', 'invalid_status', 'forbidden', 'not_found'])
+
+        pending.refresh_from_db()
+        self.assertEqual((pending.status_id, pending.version), (self.in_progress.id, 2))
+        self.assertIsNotNone(pending.l1_approved_at)
+        self.assertEqual(TaskListAuditLog.objects.filter(task=pending, action='L1_APPROVE').count(), 1)
+        self.assertEqual(self.summary()[(self.in_progress.id, date(2026, 1, 5))], (Decimal('1.00'), 1))
+
+    def test_without_ids_approves_the_filtered_inbox(self):
+        early = self.entry()
+        late = self.entry(date=date(2026, 2, 2))
+
+        response = self.client_for(self.approver).post(
+            self.url + "?end_date=2026-01-31", {'action': 'L1_APPROVE'}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': early.id, 'result': 'approved'}])
+        self.assertFalse(response.data['has_more'])
+        late.refresh_from_db()
+        self.assertEqual(late.status_id, self.draft.id)
+
+    def test_invalid_action_is_rejected(self):
+        response = self.client_for(self.approver).post(self.url, {'action': 'APPROVE'}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class LeaderboardTests(TaskListTestCase):
+    url = "/task/top-members/"
+
+    def test_rankings_are_cached_in_the_shared_cache_until_a_write(self):
+        self.entry()
+        client = self.client_for(self.approver)
+        self.assertEqual(client.get(self.url)["X-Cache"], "MISS")
+        self.assertEqual(client.get(self.url)["X-Cache"], "HIT")
+        self.assertIsNotNone(versioning.get_cache().get(leaderboard.GENERATION_KEY))
+        self.assertIsNone(caches['default'].get(leaderboard.GENERATION_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.user).post("/task/createTask/", [
+                {'date': '2026-01-05', 'platform': self.platform.id, 'task': self.task.id,
+                 'status': self.draft.id, 'duration': '2.00'},
+            ], format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response = client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["top_members"][0]["total_hours_decimal"], "2.00")
+
+
+class AuditLogTests(TaskListTestCase):
+    def test_entries_carry_the_performer_name(self):
+        entry = self.entry()
+        TaskListAuditLog.objects.create(task=entry, action='CREATE', performed_by=self.user, remarks="Created")
+        TaskListAuditLog.objects.create(task=entry, action='UPDATE', performed_by=None, remarks='')
+
+        response = self.client_for(self.user).get(f"/task/tasks/{entry.id}/audit-logs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                {key: row[key] for key in ('action', 'performed_by', 'performed_by_username', 'remarks')}
+                for row in response.data['results']
+            ],
+            [
+                {'action': 'UPDATE', 'performed_by': None, 'performed_by_username': None, 'remarks': ''},
+                {'action': 'CREATE', 'performed_by': self.user.id,
+                 'performed_by_username': "alice@example.com", 'remarks': "Created"},
+            ],
+        )
+        self.assertEqual(set(response.data['results'][0]), {
+            'id', 'action', 'performed_by', 'performed_by_username',
+            'old_values', 'new_values', 'remarks', 'created_at',
+        })
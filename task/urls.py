@@ -5,7 +5,7 @@
 #     path('', views.task_home, name='task-home'),
 # ]
 from django.urls import path
-from .views import TaskListAPIView,TaskListAuditLogAPIView,SimpleTimeLogView,TimeLogStatsAPIView,WorkHoursOverviewAPIView,TopMembersAPIView
+from .views import TaskListAPIView,TaskListBulkImportAPIView,ApprovalInboxAPIView,BulkApprovalAPIView,TaskListAuditLogAPIView,SimpleTimeLogView,TimeLogExportAPIView,TimeLogStatsAPIView,WorkHoursOverviewAPIView,TopMembersAPIView
 
 app_name = 'tasks'
 
@@ -17,10 +17,14 @@ urlpatterns = [
     # Detail + Update + Delete
     path('taskslist/<int:pk>/', TaskListAPIView.as_view(), name='task-detail'),
     path('tasks/<int:pk>/', TaskListAPIView.as_view(), name='task-detail'),
+    path('tasks/bulk-import/', TaskListBulkImportAPIView.as_view(), name='task-bulk-import'),
+    path('tasks/approvals/inbox/', ApprovalInboxAPIView.as_view(), name='task-approval-inbox'),
+    path('tasks/approvals/bulk/', BulkApprovalAPIView.as_view(), name='task-approval-bulk'),
      path('tasks/audit-logs/', TaskListAuditLogAPIView.as_view(), name='task-audit-logs'),
     path('tasks/<int:task_id>/audit-logs/', TaskListAuditLogAPIView.as_view(), name='task-specific-audit-logs'),
     path('simple-time-logs/', SimpleTimeLogView.as_view(), name='simple-time-logs'),
     path('simple-time-logs/<int:pk>/', SimpleTimeLogView.as_view(), name='simple-time-log-detail'),
+    path('time-logs/export/', TimeLogExportAPIView.as_view(), name='time-logs-export'),
     path('time-logs/stats/', TimeLogStatsAPIView.as_view(), name='time-logs-stats'),
     path('work-hours/', WorkHoursOverviewAPIView.as_view(), name='work-hours'),
     path('top-members/', TopMembersAPIView.as_view(), name='top-members'),
@@ -1,6 +1,12 @@
 # views.py
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import F, Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -8,17 +14,23 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
 
-from .models import TaskList, TaskListAuditLog
-from .serializers import TaskListSerializer, TaskListAuditLogSerializer
-from master.models import Status
+from .models import TaskList, TaskListAuditLog, DailyUserSummary, StaleVersion
+from .serializers import TaskListSerializer, TaskListAuditLogSerializer, TaskListImportRowSerializer
+from .pagination import TaskListCursorPagination, TaskListAuditLogCursorPagination, ApprovalInboxPagination
+from . import audit, summary, leaderboard, list_rows, fieldsets, concurrency
+from .search import apply_search
+from .idempotency import idempotent
+from master import status_registry
+from time_Sheet.middleware import measure_serialization
 from isoweek import Week
 from django.db.models import Count, Q,Sum
+from django.db.models.functions import TruncMonth
 from datetime import datetime, timedelta, date
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 class IsOwnerOrStaffApprover(IsAuthenticated):
     def has_object_permission(self, request, view, obj):
-        if obj.user == request.user:
+        if obj.user_id == request.user.id:
             return True
 
         # Only staff (admin) can access/approve/edit non-owned tasks
@@ -27,6 +39,7 @@ class IsOwnerOrStaffApprover(IsAuthenticated):
 
 class TaskListAPIView(APIView):
     serializer_class = TaskListSerializer
+    pagination_class = TaskListCursorPagination
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -38,28 +51,21 @@ class TaskListAPIView(APIView):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = TaskList.objects.select_related(
-            'platform', 'task', 'subtask', 'status',
-            'l1_approver', 'l2_approver', 'last_modified_by'
-        ).order_by('-date', 'task__name')
-
-        if not user.is_staff:
-            queryset = queryset.filter(user=user)
-
-        return queryset
+        return TaskList.objects.with_related().visible_to(self.request.user).order_by('-date', 'task__name')
 
     def get_object(self, pk):
-        task = get_object_or_404(TaskList, pk=pk)
-        if task.user != self.request.user and not self.request.user.is_staff:
+        # One query: the entry, its master rows and narrowed related users
+        task = get_object_or_404(TaskList.objects.with_related(), pk=pk)
+        if task.user_id != self.request.user.id and not self.request.user.is_staff:
             raise PermissionDenied("You don't have permission to access this task.")
         return task
 
-    def _create_audit_log(self, task, action, old_values=None, new_values=None, remarks=None):
-        TaskListAuditLog.objects.create(
-            task=task,
+    def _build_audit_log(self, task, action, old_values=None, new_values=None, remarks=None):
+        # Plain ids: the entry may be written after the request (see task.audit)
+        return TaskListAuditLog(
+            task_id=task.id,
             action=action,
-            performed_by=self.request.user,
+            performed_by_id=self.request.user.id,
             old_values=old_values or {},
             new_values=new_values or {},
             remarks=remarks or '',
@@ -67,6 +73,24 @@ class TaskListAPIView(APIView):
             user_agent=self.request.META.get('HTTP_USER_AGENT', '')
         )
 
+    @staticmethod
+    def _audit_values(task):
+        """Old/new values recorded for UPDATE and approval audit entries."""
+        task_status = status_registry.get_by_id(task.status_id)
+        return {
+            'status': task_status.name if task_status else None,
+            'duration': str(task.duration) if task.duration is not None else None,
+            'description': task.description or "",
+            'bitrix_id': task.bitrix_id or "",
+            'l1_approver_id': task.l1_approver_id,
+            'l2_approver_id': task.l2_approver_id,
+            'l1_approved_at': task.l1_approved_at.isoformat() if task.l1_approved_at else None,
+            'l2_approved_at': task.l2_approved_at.isoformat() if task.l2_approved_at else None,
+        }
+
+    def _create_audit_log(self, task, action, old_values=None, new_values=None, remarks=None):
+        audit.record([self._build_audit_log(task, action, old_values, new_values, remarks)])
+
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -88,24 +112,50 @@ class TaskListAPIView(APIView):
         if params.get('status'):
             queryset = queryset.filter(status_id=params['status'])
         if search := params.get('search'):
-            queryset = queryset.filter(
-                Q(description__icontains=search) |
-                Q(bitrix_id__icontains=search) |
-                Q(task__name__icontains=search) |
-                Q(subtask__name__icontains=search) |
-                Q(user__username__icontains=search)
-            )
+            queryset = apply_search(queryset, search)
         return queryset
 
+    def list_response(self, request, queryset):
+        """
+        One keyset page of `queryset`, limited to `?fields=` / `?expand=`
+        (task.fieldsets). `?mode=fast` builds the rows from a `.values()`
+        projection (task.list_rows) instead of the serializer; the JSON is
+        the same.
+        """
+        fields = fieldsets.TASK_LIST_FIELDS.requested(request.query_params)
+        paginator = self.pagination_class()
+
+        if request.query_params.get('mode') == 'fast':
+            page = paginator.paginate_queryset(list_rows.project(queryset), request, view=self)
+            with measure_serialization(request):
+                data = list_rows.represent(page)
+                if fields is not None:
+                    data = [{key: row[key] for key in fields if key in row} for row in data]
+            return paginator.get_paginated_response(data)
+
+        if fields is not None:
+            queryset = fieldsets.TASK_LIST_FIELDS.apply(
+                queryset, fields, extra_paths=fieldsets.ordering_paths(paginator.ordering)
+            )
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        with measure_serialization(request):
+            data = self.serializer_class(page, many=True, fields=fields).data
+        return paginator.get_paginated_response(data)
+
     def get(self, request, pk=None):
         if pk:
             task = self.get_object(pk)
-            return Response(self.serializer_class(task).data)
+            fields = fieldsets.TASK_LIST_FIELDS.requested(request.query_params)
+            with measure_serialization(request):
+                data = self.serializer_class(task, fields=fields).data
+            response = Response(data)
+            return concurrency.with_etag(response, task.version)
 
         qs = self.get_queryset()
         qs = self.apply_filters(request, qs)
-        return Response(self.serializer_class(qs, many=True).data)
+        return self.list_response(request, qs)
 
+    @idempotent
     def post(self, request):
         if request.user.is_staff:
             return Response(
@@ -126,35 +176,40 @@ class TaskListAPIView(APIView):
             print("Create errors:", serializer.errors)
             return Response(serializer.errors, status=400)
 
-        tasks = serializer.save()
+        with transaction.atomic():
+            tasks = serializer.save()
+            created = tasks if is_bulk else [tasks]
 
-        for task in (tasks if is_bulk else [tasks]):
-            self._create_audit_log(
-                task=task,
-                action='CREATE',
-                new_values=self.serializer_class(task).data,
-                remarks="Bulk task created" if is_bulk else "Task created"
-            )
+            audit.record([
+                self._build_audit_log(
+                    task=task,
+                    action='CREATE',
+                    new_values=self.serializer_class(task).data,
+                    remarks="Bulk task created" if is_bulk else "Task created"
+                )
+                for task in created
+            ])
+
+            summary.record(added=[summary.snapshot(task) for task in created])
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @idempotent
     def put(self, request, pk):
         task = self.get_object(pk)
+        if concurrency.if_match_fails(request, task):
+            return concurrency.precondition_failed(pk)
+        # Everything below is decided on this version of the entry
+        version_read = task.version
         user = request.user
+        action = request.data.get('action')
 
-        status_lower = (task.status.name or '').lower().strip() if task.status else ''
+        current_status = status_registry.get_by_id(task.status_id)
+        status_lower = status_registry.normalize(current_status.name) if current_status else ''
 
         # Capture meaningful old values BEFORE any changes
-        old_values = {
-            'status': task.status.name if task.status else None,
-            'duration': str(task.duration) if task.duration is not None else None,
-            'description': task.description or "",
-            'bitrix_id': task.bitrix_id or "",
-            'l1_approver_id': task.l1_approver_id,
-            'l2_approver_id': task.l2_approver_id,
-            'l1_approved_at': task.l1_approved_at.isoformat() if task.l1_approved_at else None,
-            'l2_approved_at': task.l2_approved_at.isoformat() if task.l2_approved_at else None,
-        }
+        old_snapshot = summary.snapshot(task)
+        old_values = self._audit_values(task)
 
         # ... permission checks, idempotent responses, edit permission ...
 
@@ -170,10 +225,8 @@ class TaskListAPIView(APIView):
             return Response(serializer.errors, status=400)
 
         # Status objects
-        in_progress = Status.objects.filter(name__iexact='In Progress').first() or \
-                      Status.objects.filter(name__iexact='inprogress').first()
-        completed   = Status.objects.filter(name__iexact='Completed').first() or \
-                      Status.objects.filter(name__iexact='Done').first()
+        in_progress = status_registry.in_progress()
+        completed   = status_registry.completed()
 
         changed_fields = set()
 
@@ -210,20 +263,17 @@ class TaskListAPIView(APIView):
 
         serializer.validated_data['last_modified_by'] = user
 
-        # Perform the actual update
-        updated_task = serializer.save()
+        # Perform the actual update, unless someone else changed the entry
+        # since it was read (no row lock; see task.concurrency)
+        try:
+            with transaction.atomic():
+                updated_task = serializer.save(expected_version=version_read)
+                summary.record(added=[summary.snapshot(updated_task)], removed=[old_snapshot])
+        except StaleVersion:
+            return concurrency.precondition_failed(pk)
 
         # Capture new values AFTER save
-        new_values = {
-            'status': updated_task.status.name if updated_task.status else None,
-            'duration': str(updated_task.duration) if updated_task.duration is not None else None,
-            'description': updated_task.description or "",
-            'bitrix_id': updated_task.bitrix_id or "",
-            'l1_approver_id': updated_task.l1_approver_id,
-            'l2_approver_id': updated_task.l2_approver_id,
-            'l1_approved_at': updated_task.l1_approved_at.isoformat() if updated_task.l1_approved_at else None,
-            'l2_approved_at': updated_task.l2_approved_at.isoformat() if updated_task.l2_approved_at else None,
-        }
+        new_values = self._audit_values(updated_task)
 
         # Determine action name for log
         if action == 'L1_APPROVE':
@@ -244,11 +294,14 @@ class TaskListAPIView(APIView):
             remarks=remarks
         )
 
-        return Response(serializer.data)
+        return concurrency.with_etag(Response(serializer.data), updated_task.version)
     def delete(self, request, pk):
         task = self.get_object(pk)
-        status_name = (task.status.name or '').lower().strip() if task.status else ''
-        if task.user != request.user or status_name != 'draft':
+        if concurrency.if_match_fails(request, task):
+            return concurrency.precondition_failed(pk)
+        current_status = status_registry.get_by_id(task.status_id)
+        status_name = status_registry.normalize(current_status.name) if current_status else ''
+        if task.user_id != request.user.id or status_name != 'draft':
             return Response({"error": "Only owner can delete draft tasks"}, status=403)
 
         self._create_audit_log(
@@ -257,28 +310,336 @@ class TaskListAPIView(APIView):
             old_values={'id': task.id, 'task_name': task.task.name if task.task else None},
             remarks="Deleted by owner"
         )
-        task.delete()
+        with transaction.atomic():
+            removed = summary.snapshot(task)
+            task.delete()
+            summary.record(removed=[removed])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-# Audit log view remains unchanged
+class TaskListBulkImportAPIView(TaskListAPIView):
+    """
+    POST /task/tasks/bulk-import/   → body: list of task rows
+
+    Validates the whole batch in memory, resolves Platform/Task/SubTask/Status
+    with one query per table, then inserts all tasks with one bulk_create
+    inside a single transaction. Either every row is imported or none is; the
+    CREATE audit rows are batched through task.audit once it commits.
+    """
+    http_method_names = ['post', 'options']
+    max_rows = getattr(settings, 'TASK_BULK_IMPORT_MAX_ROWS', 5000)
+
+    @idempotent
+    def post(self, request):
+        if request.user.is_staff:
+            return Response(
+                {"error": "Staff users cannot create tasks"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "Expected a non-empty list of tasks"}, status=400)
+        if len(rows) > self.max_rows:
+            return Response(
+                {"error": f"A single import is limited to {self.max_rows} rows"},
+                status=400
+            )
+
+        serializer = TaskListImportRowSerializer(
+            data=rows,
+            many=True,
+            context={'request': request}
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        with transaction.atomic():
+            tasks = serializer.save()
+            audit.record([
+                self._build_audit_log(
+                    task=task,
+                    action='CREATE',
+                    new_values=TaskListImportRowSerializer.audit_values(task),
+                    remarks="Bulk task imported"
+                )
+                for task in tasks
+            ])
+            summary.record(added=[summary.snapshot(task) for task in tasks])
+
+        return Response({
+            "status": "success",
+            "count": len(tasks),
+            "ids": [task.id for task in tasks],
+        }, status=status.HTTP_201_CREATED)
+
+
+class ApprovalInboxAPIView(TaskListAPIView):
+    """
+    GET /task/tasks/approvals/inbox/?level=l1|l2
+
+    Entries waiting for the current user's approval:
+      L1 - l1_approver is me, status Draft, not yet L1-approved
+      L2 - l2_approver is me, status In Progress, not yet L2-approved
+
+    Keyset-paginated oldest first (?cursor=, ?page_size=). The first page also
+    carries `counts` per level / status, computed in one aggregate query.
+    """
+    http_method_names = ['get', 'options']
+    pagination_class = ApprovalInboxPagination
+    levels = ('l1', 'l2')
+
+    def pending_conditions(self, user):
+        draft = status_registry.draft()
+        in_progress = status_registry.in_progress()
+
+        conditions = {}
+        if draft:
+            conditions['l1'] = (draft, Q(l1_approver=user, status=draft, l1_approved_at__isnull=True))
+        if in_progress:
+            conditions['l2'] = (in_progress, Q(l2_approver=user, status=in_progress, l2_approved_at__isnull=True))
+        return conditions
+
+    def get(self, request):
+        level = request.query_params.get('level')
+        if level and level not in self.levels:
+            return Response({"error": "Invalid level. Use: l1, l2"}, status=400)
+
+        conditions = self.pending_conditions(request.user)
+        if level:
+            conditions = {key: value for key, value in conditions.items() if key == level}
+
+        condition = Q()
+        for _, level_condition in conditions.values():
+            condition |= level_condition
+
+        if not conditions:
+            queryset = TaskList.objects.none()
+        else:
+            queryset = self.apply_filters(request, TaskList.objects.filter(condition))
+
+        response = self.list_response(request, queryset.with_related())
+
+        if not request.query_params.get(self.pagination_class.cursor_query_param):
+            response.data['counts'] = self.get_counts(queryset, conditions)
+        return response
+
+    def get_counts(self, queryset, conditions):
+        """Per-level totals over the same filtered rows the page is drawn from."""
+        if not conditions:
+            return {"total": 0, "by_level": []}
+
+        totals = queryset.aggregate(**{
+            key: Count('id', filter=level_condition)
+            for key, (_, level_condition) in conditions.items()
+        })
+        by_level = [
+            {"level": key.upper(), "status": pending_status.name, "count": totals[key]}
+            for key, (pending_status, _) in conditions.items()
+        ]
+        return {
+            "total": sum(totals.values()),
+            "by_level": by_level,
+        }
+
+
+class BulkApprovalAPIView(TaskListAPIView):
+    """
+    POST /task/tasks/approvals/bulk/
+
+    {"action": "L1_APPROVE" | "L2_APPROVE", "ids": [...], "remarks": "..."}
+        approve the listed entries; every id gets a result:
+        approved / not_found / forbidden / invalid_status
+
+    {"action": ...} without "ids"
+        approve everything in the caller's inbox for that level, narrowed by
+        the usual TaskList query-string filters (start_date, user_id, ...)
+
+    Eligibility mirrors the per-entry PUT: L1 needs a Draft entry without L1
+    approval, L2 an In Progress entry without L2 approval, and the caller
+    must be the assigned approver (staff may take unassigned entries when
+    listing ids). Rows are locked and checked with one query, then changed
+    with a single UPDATE; audit entries and summary deltas are written as one
+    batch each.
+    """
+    http_method_names = ['post', 'options']
+    actions = ('L1_APPROVE', 'L2_APPROVE')
+    max_rows = getattr(settings, 'TASK_BULK_APPROVAL_MAX_ROWS', 5000)
+
+    only_fields = (
+        'id', 'user_id', 'date', 'platform_id', 'task_id', 'subtask_id', 'status_id',
+        'bitrix_id', 'duration', 'description',
+        'l1_approver_id', 'l2_approver_id', 'l1_approved_at', 'l2_approved_at',
+    )
+
+    @idempotent
+    def post(self, request):
+        user = request.user
+        action = request.data.get('action')
+        if action not in self.actions:
+            return Response({"error": f"Invalid action. Use: {' / '.join(self.actions)}"}, status=400)
+
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                return Response({"error": "ids must be a non-empty list"}, status=400)
+            try:
+                ids = list(dict.fromkeys(int(pk) for pk in ids))
+            except (TypeError, ValueError):
+                return Response({"error": "ids must be integers"}, status=400)
+            if len(ids) > self.max_rows:
+                return Response({"error": f"A single request is limited to {self.max_rows} entries"}, status=400)
+
+        if action == 'L1_APPROVE':
+            pending_status, new_status = status_registry.draft(), status_registry.in_progress()
+            approver_field, approved_at_field = 'l1_approver_id', 'l1_approved_at'
+        else:
+            pending_status, new_status = status_registry.in_progress(), status_registry.completed()
+            approver_field, approved_at_field = 'l2_approver_id', 'l2_approved_at'
+        if not pending_status or not new_status:
+            return Response({"error": "Approval statuses are not configured"}, status=400)
+
+        now = timezone.now()
+        changes = {
+            approver_field: user.id,
+            approved_at_field: now,
+            'status_id': new_status.id,
+            'last_modified_by_id': user.id,
+            'updated_at': now,
+        }
+        if action == 'L1_APPROVE':
+            # Same L2 hand-off as the per-entry PUT
+            supervisor = getattr(user, 'user_id_supervisor', None)
+            changes['l2_approver_id'] = supervisor.id if supervisor and supervisor.is_manager else None
+
+        remarks = request.data.get('remarks', f"Task {action.lower()}d (bulk)")
+
+        with transaction.atomic():
+            if ids is not None:
+                candidates = TaskList.objects.filter(id__in=ids)
+            else:
+                candidates = self.apply_filters(request, TaskList.objects.filter(**{
+                    approver_field: user.id,
+                    'status_id': pending_status.id,
+                    f'{approved_at_field}__isnull': True,
+                }))
+            tasks = list(
+                candidates.only(*self.only_fields)
+                .order_by('date', 'id')
+                .select_for_update()[:self.max_rows + 1]
+            )
+
+            has_more = ids is None and len(tasks) > self.max_rows
+            tasks = tasks[:self.max_rows]
+
+            results = {}
+            approved = []
+            for task in tasks:
+                assigned = getattr(task, approver_field)
+                if assigned != user.id and not (assigned is None and user.is_staff):
+                    results[task.id] = 'forbidden'
+                elif task.status_id != pending_status.id or getattr(task, approved_at_field):
+                    results[task.id] = 'invalid_status'
+                else:
+                    results[task.id] = 'approved'
+                    approved.append(task)
+
+            if approved:
+                TaskList.objects.filter(id__in=[task.id for task in approved]).update(
+                    version=F('version') + 1, **changes
+                )
+
+                old_snapshots = [summary.snapshot(task) for task in approved]
+                entries = []
+                for task in approved:
+                    old_values = self._audit_values(task)
+                    for field, value in changes.items():
+                        setattr(task, field, value)
+                    entries.append(self._build_audit_log(
+                        task=task,
+                        action=action,
+                        old_values=old_values,
+                        new_values=self._audit_values(task),
+                        remarks=remarks
+                    ))
+                audit.record(entries)
+                summary.record(
+                    added=[summary.snapshot(task) for task in approved],
+                    removed=old_snapshots
+                )
+
+        order = ids if ids is not None else [task.id for task in tasks]
+        response = {
+            "action": action,
+            "requested": len(order),
+            "approved": len(approved),
+            "results": [{"id": pk, "result": results.get(pk, 'not_found')} for pk in order],
+        }
+        if ids is None:
+            response["has_more"] = has_more
+        return Response(response)
+
+
 class TaskListAuditLogAPIView(APIView):
+    """
+    GET /task/tasks/audit-logs/                 → audit entries visible to the user
+    GET /task/tasks/<task_id>/audit-logs/       → entries of one task
+
+    Keyset-paginated, newest first (?cursor=, ?page_size=). Filters:
+    action, performed_by (user id), task, start_date / end_date (YYYY-MM-DD,
+    on created_at in the current timezone).
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskListAuditLogCursorPagination
+
+    # Only what TaskListAuditLogSerializer renders
+    only_fields = (
+        'id', 'action', 'performed_by', 'performed_by__name',
+        'old_values', 'new_values', 'remarks', 'created_at',
+    )
+
+    def get_queryset(self, request, task_id=None):
+        logs = TaskListAuditLog.objects.select_related('performed_by').only(*self.only_fields)
 
-    def get(self, request, task_id=None):
         if task_id:
-            task = get_object_or_404(TaskList, pk=task_id)
-            if task.user != request.user and not request.user.is_staff:
+            task = get_object_or_404(TaskList.objects.only('id', 'user_id'), pk=task_id)
+            if task.user_id != request.user.id and not request.user.is_staff:
                 raise PermissionDenied()
-            logs = TaskListAuditLog.objects.filter(task=task).order_by('-created_at')
-        else:
-            if request.user.is_staff:
-                logs = TaskListAuditLog.objects.all().order_by('-created_at')
-            else:
-                logs = TaskListAuditLog.objects.filter(task__user=request.user).order_by('-created_at')
+            return logs.filter(task_id=task_id)
+
+        if not request.user.is_staff:
+            logs = logs.filter(task__user=request.user)
+        return logs
 
-        serializer = TaskListAuditLogSerializer(logs, many=True)
-        return Response(serializer.data)
+    def apply_filters(self, request, queryset):
+        params = request.query_params
+        tz = timezone.get_current_timezone()
+
+        if params.get('action'):
+            queryset = queryset.filter(action__in=params['action'].split(','))
+        if params.get('performed_by'):
+            queryset = queryset.filter(performed_by_id=params['performed_by'])
+        if params.get('task'):
+            queryset = queryset.filter(task_id=params['task'])
+        # Whole-day bounds as datetimes so the created_at index is usable
+        if params.get('start_date'):
+            start = datetime.strptime(params['start_date'], '%Y-%m-%d')
+            queryset = queryset.filter(created_at__gte=timezone.make_aware(start, tz))
+        if params.get('end_date'):
+            end = datetime.strptime(params['end_date'], '%Y-%m-%d') + timedelta(days=1)
+            queryset = queryset.filter(created_at__lt=timezone.make_aware(end, tz))
+        return queryset
+
+    def get(self, request, task_id=None):
+        logs = self.get_queryset(request, task_id)
+        try:
+            logs = self.apply_filters(request, logs)
+        except ValueError:
+            return Response({"error": "Invalid filter value (dates use YYYY-MM-DD, ids are integers)"}, status=400)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        return paginator.get_paginated_response(TaskListAuditLogSerializer(page, many=True).data)
 
 # class TaskListAuditLogAPIView(APIView):
 #     permission_classes = [IsAuthenticated]
@@ -570,6 +931,23 @@ from django.utils import timezone
 from .models import TaskList
 
 
+def _clock_time(value, tz):
+    return value.astimezone(tz).strftime("%I:%M:%S %p") if value else None
+
+
+# SimpleTimeLogView record keys -> value
+_TIME_LOG_ITEM = {
+    "date": lambda task, tz: task.date.isoformat() if task.date else None,
+    "platform_name": lambda task, tz: task.platform.name if task.platform else None,
+    "task_name": lambda task, tz: task.task.name if task.task else None,
+    "subtask_name": lambda task, tz: task.subtask.name if task.subtask else None,
+    "bitrix_id": lambda task, tz: task.bitrix_id or None,
+    "duration_hours": lambda task, tz: f"{float(task.duration):.2f}" if task.duration is not None else None,
+    "created_time": lambda task, tz: _clock_time(task.created_at, tz),
+    "updated_time": lambda task, tz: _clock_time(task.updated_at, tz),
+}
+
+
 class SimpleTimeLogView(APIView):
     """
     GET /api/simple-time-logs/          → list (all if staff, own only if normal user)
@@ -577,47 +955,64 @@ class SimpleTimeLogView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    def apply_filters(self, request, queryset):
+        params = request.query_params
+
+        if params.get('start_date'):
+            queryset = queryset.filter(date__gte=params['start_date'])
+        if params.get('end_date'):
+            queryset = queryset.filter(date__lte=params['end_date'])
+        if params.get('platform'):
+            queryset = queryset.filter(platform_id=params['platform'])
+        if params.get('task'):
+            queryset = queryset.filter(task_id=params['task'])
+        if params.get('status'):
+            queryset = queryset.filter(status_id=params['status'])
+        if search := params.get('search'):
+            queryset = apply_search(queryset, search, include_user=False)
+
+        # Extra: staff can also filter by specific user if they want
+        if request.user.is_staff and (uid := params.get('user_id')):
+            queryset = queryset.filter(user_id=uid)
+
+        return queryset
+
+    def serialize_log(self, task, tz, fields=None):
+        """One record; `fields` limits the keys (and so the relations touched)."""
+        return {
+            name: build(task, tz)
+            for name, build in _TIME_LOG_ITEM.items()
+            if fields is None or name in fields
+        }
+
     def get(self, request, pk=None):
         user = request.user
         tz = timezone.get_current_timezone()
+        fields = fieldsets.TIME_LOG_FIELDS.requested(request.query_params)
 
         # ────────────────────────────────────────────────
         #  SINGLE RECORD (when pk is provided)
         # ────────────────────────────────────────────────
         if pk:
-            task = get_object_or_404(TaskList, pk=pk)
+            task = get_object_or_404(TaskList.objects.with_related(users=()), pk=pk)
 
             # Permission: only owner or staff can see this record
-            if task.user != user and not user.is_staff:
+            if task.user_id != user.id and not user.is_staff:
                 return Response(
                     {"error": "You do not have permission to view this record"},
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            created = task.created_at.astimezone(tz) if task.created_at else None
-            updated = task.updated_at.astimezone(tz) if task.updated_at else None
-
-            data = {
-                "date": task.date.isoformat() if task.date else None,
-                "platform_name": task.platform.name if task.platform else None,
-                "task_name": task.task.name if task.task else None,
-                "subtask_name": task.subtask.name if task.subtask else None,
-                "bitrix_id": task.bitrix_id or None,
-                "duration_hours": f"{float(task.duration):.2f}" if task.duration is not None else None,
-                "created_time": created.strftime("%I:%M:%S %p") if created else None,
-                "updated_time": updated.strftime("%I:%M:%S %p") if updated else None,
-            }
-
             return Response({
                 "status": "success",
-                "data": data
+                "data": self.serialize_log(task, tz, fields)
             })
 
         # ────────────────────────────────────────────────
         #  LIST OF RECORDS
         # ────────────────────────────────────────────────
-        queryset = TaskList.objects.select_related(
-            'platform', 'task', 'subtask'
+        queryset = TaskList.objects.with_related(
+            users=(), masters=('platform', 'task', 'subtask')
         ).order_by('-date', '-created_at')
 
         # ──── This is the key logic you asked for ────
@@ -629,55 +1024,116 @@ class SimpleTimeLogView(APIView):
             queryset = queryset.filter(user=user)
 
         # Apply filters from query params (same as before)
-        params = request.query_params
+        queryset = self.apply_filters(request, queryset)
 
-        if params.get('start_date'):
-            queryset = queryset.filter(date__gte=params['start_date'])
-        if params.get('end_date'):
-            queryset = queryset.filter(date__lte=params['end_date'])
-        if params.get('platform'):
-            queryset = queryset.filter(platform_id=params['platform'])
-        if params.get('task'):
-            queryset = queryset.filter(task_id=params['task'])
-        if params.get('status'):
-            queryset = queryset.filter(status_id=params['status'])
-        if search := params.get('search'):
-            queryset = queryset.filter(
-                Q(description__icontains=search) |
-                Q(bitrix_id__icontains=search) |
-                Q(task__name__icontains=search) |
-                Q(subtask__name__icontains=search)
+        # ?fields= / ?expand=: only join and load what the keys need
+        if fields is not None:
+            queryset = fieldsets.TIME_LOG_FIELDS.apply(
+                queryset, fields, extra_paths=fieldsets.ordering_paths(queryset.query.order_by)
             )
 
-        # Extra: staff can also filter by specific user if they want
-        if user.is_staff and (uid := params.get('user_id')):
-            queryset = queryset.filter(user_id=uid)
-
         # Prepare response data
-        result = []
-        for task in queryset:
-            created = task.created_at.astimezone(tz) if task.created_at else None
-            updated = task.updated_at.astimezone(tz) if task.updated_at else None
-
-            item = {
-                "date": task.date.isoformat() if task.date else None,
-                "platform_name": task.platform.name if task.platform else None,
-                "task_name": task.task.name if task.task else None,
-                "subtask_name": task.subtask.name if task.subtask else None,
-                "bitrix_id": task.bitrix_id or None,
-                "duration_hours": f"{float(task.duration):.2f}" if task.duration is not None else None,
-                "created_time": created.strftime("%I:%M:%S %p") if created else None,
-                "updated_time": updated.strftime("%I:%M:%S %p") if updated else None,
-            }
-            result.append(item)
+        result = [self.serialize_log(task, tz, fields) for task in queryset]
 
         return Response({
             "status": "success",
             "count": len(result),
             "data": result
         })
-        
-        
+
+
+class _EchoBuffer:
+    """File-like object whose write() just returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+class TimeLogExportAPIView(SimpleTimeLogView):
+    """
+    GET /task/time-logs/export/?export_format=csv      → CSV download (default)
+    GET /task/time-logs/export/?export_format=ndjson   → one JSON object per line
+
+    Accepts the same filters as SimpleTimeLogView (start_date, end_date,
+    platform, task, status, user_id, search). Rows are streamed from a
+    `.values()` projection through a server-side cursor, so memory stays flat
+    regardless of the date range.
+    """
+    chunk_size = getattr(settings, 'TIME_LOG_EXPORT_CHUNK_SIZE', 2000)
+
+    value_fields = [
+        'date', 'user_id', 'user__name', 'platform__name', 'task__name',
+        'subtask__name', 'status__name', 'bitrix_id', 'duration',
+        'description', 'created_at', 'updated_at',
+    ]
+    columns = [
+        'date', 'user_id', 'user_name', 'platform_name', 'task_name',
+        'subtask_name', 'status_name', 'bitrix_id', 'duration_hours',
+        'description', 'created_time', 'updated_time',
+    ]
+    formats = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is produced here, not by a DRF renderer; don't 406 on text/csv
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in self.formats:
+            return Response({"error": "Invalid export_format. Use: csv, ndjson"}, status=400)
+
+        queryset = TaskList.objects.order_by('-date', '-created_at', '-id')
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        queryset = self.apply_filters(request, queryset)
+
+        tz = timezone.get_current_timezone()
+        rows = (
+            self._format_row(row, tz)
+            for row in queryset.values(*self.value_fields).iterator(chunk_size=self.chunk_size)
+        )
+        if export_format == 'csv':
+            content = self._stream_csv(rows)
+        else:
+            content = self._stream_ndjson(rows)
+
+        filename = f"time-logs-{timezone.localdate().isoformat()}.{export_format}"
+        response = StreamingHttpResponse(content, content_type=self.formats[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _format_row(self, row, tz):
+        created = row['created_at'].astimezone(tz) if row['created_at'] else None
+        updated = row['updated_at'].astimezone(tz) if row['updated_at'] else None
+        return {
+            "date": row['date'].isoformat() if row['date'] else None,
+            "user_id": row['user_id'],
+            "user_name": row['user__name'],
+            "platform_name": row['platform__name'],
+            "task_name": row['task__name'],
+            "subtask_name": row['subtask__name'],
+            "status_name": row['status__name'],
+            "bitrix_id": row['bitrix_id'] or None,
+            "duration_hours": f"{float(row['duration']):.2f}" if row['duration'] is not None else None,
+            "description": row['description'] or "",
+            "created_time": created.strftime("%I:%M:%S %p") if created else None,
+            "updated_time": updated.strftime("%I:%M:%S %p") if updated else None,
+        }
+
+    def _stream_csv(self, rows):
+        writer = csv.writer(_EchoBuffer())
+        yield writer.writerow(self.columns)
+        for row in rows:
+            yield writer.writerow([row[col] for col in self.columns])
+
+    def _stream_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(row) + "\n"
+
+
 # Task Status Overview
 
 class TimeLogStatsAPIView(APIView):
@@ -693,8 +1149,8 @@ class TimeLogStatsAPIView(APIView):
         if period not in ['daily', 'weekly', 'monthly']:
             return Response({"error": "Invalid period. Use: daily, weekly, monthly"}, status=400)
 
-        # ─── Base queryset ──────────────────────────────────────────
-        qs = TaskList.objects.all()
+        # ─── Base queryset (daily rollup) ───────────────────────────
+        qs = DailyUserSummary.objects.all()
 
         if not user.is_staff:
             qs = qs.filter(user=user)
@@ -719,7 +1175,7 @@ class TimeLogStatsAPIView(APIView):
             start_date = datetime(year, month, 1).date()
             # Last day of month
             next_month = start_date + relativedelta(months=1)
-            end_date = (next_month - timedelta(days=1)).date()
+            end_date = next_month - timedelta(days=1)
             title_range = f"{start_date.isoformat()} to {end_date.isoformat()}"
 
         # Apply date filter
@@ -730,7 +1186,7 @@ class TimeLogStatsAPIView(APIView):
         status_counts = qs.values(
             'status__name'
         ).annotate(
-            count=Count('id')
+            count=Sum('entry_count')
         ).order_by('status__name')
 
         total = sum(item['count'] for item in status_counts)
@@ -768,9 +1224,18 @@ class WorkHoursOverviewAPIView(APIView):
     • ?view=week&year=2026&week=6   → specific week
     • ?view=year          → current year (all 12 months summary)
     • ?view=year&year=2026   → specific year (all 12 months)
+    • ?view=year&group_by=user|platform|task   → per-month breakdown as well
+
+    Totals are read from the DailyUserSummary rollup, not from task_list.
     """
     permission_classes = [IsAuthenticated]
 
+    GROUP_BY_FIELDS = {
+        'user': ('user_id', 'user__name'),
+        'platform': ('platform_id', 'platform__name'),
+        'task': ('task_id', 'task__name'),
+    }
+
     def get(self, request):
         user = request.user
         today = timezone.now().date()
@@ -819,13 +1284,13 @@ class WorkHoursOverviewAPIView(APIView):
             range_str = f"{start_date.isoformat()} to {end_date.isoformat()}"
 
             # Query & aggregate per day
-            qs = TaskList.objects.filter(date__range=[start_date, end_date])
+            qs = DailyUserSummary.objects.filter(date__range=[start_date, end_date])
             if not user.is_staff:
                 qs = qs.filter(user=user)
 
             daily_agg = qs.values('date').annotate(
-                total_duration=Sum('duration'),
-                entry_count=Count('id')
+                total_duration=Sum('total_duration'),
+                entry_count=Sum('entry_count')
             )
 
             daily_map = {
@@ -868,55 +1333,119 @@ class WorkHoursOverviewAPIView(APIView):
             })
 
         # ────────────────────────────────────────────────
-        # YEAR VIEW - summary per month
+        # YEAR VIEW - summary per month (single grouped query)
         # ────────────────────────────────────────────────
         else:  # view == 'year'
+            group_by = request.query_params.get('group_by')
+            if group_by and group_by not in self.GROUP_BY_FIELDS:
+                return Response(
+                    {"error": "Invalid group_by. Use: user, platform, task"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            qs = DailyUserSummary.objects.filter(date__range=[date(year, 1, 1), date(year, 12, 31)])
+            if not user.is_staff:
+                qs = qs.filter(user=user)
+            qs = qs.annotate(month=TruncMonth('date'))
+
+            month_totals = {}
+            breakdowns = {}
+
+            if not group_by:
+                rows = qs.values('month').annotate(
+                    total_duration=Sum('total_duration'),
+                    entry_count=Sum('entry_count'),
+                    active_days=Count('date', distinct=True)
+                ).order_by()
+
+                for row in rows:
+                    month_totals[self._month_key(row['month'])] = {
+                        'hours': float(row['total_duration'] or 0.0),
+                        'entries': row['entry_count'] or 0,
+                        'active_days': row['active_days'] or 0,
+                    }
+            else:
+                # One row per (month, group, day); month totals and the
+                # per-group breakdown are both rolled up from the same pass.
+                id_field, name_field = self.GROUP_BY_FIELDS[group_by]
+                rows = qs.values('month', id_field, name_field, 'date').annotate(
+                    total_duration=Sum('total_duration'),
+                    entry_count=Sum('entry_count')
+                ).order_by()
+
+                month_days = {}
+                for row in rows:
+                    key = self._month_key(row['month'])
+                    hours = float(row['total_duration'] or 0.0)
+
+                    totals = month_totals.setdefault(key, {'hours': 0.0, 'entries': 0, 'active_days': 0})
+                    totals['hours'] += hours
+                    totals['entries'] += row['entry_count']
+                    month_days.setdefault(key, set()).add(row['date'])
+
+                    group = breakdowns.setdefault(key, {}).setdefault(row[id_field], {
+                        'id': row[id_field],
+                        'name': row[name_field],
+                        'hours': 0.0,
+                        'entries': 0,
+                        'active_days': 0,
+                    })
+                    group['hours'] += hours
+                    group['entries'] += row['entry_count']
+                    group['active_days'] += 1
+
+                for key, days in month_days.items():
+                    month_totals[key]['active_days'] = len(days)
+
             yearly_data = []
             yearly_total_hours = 0.0
             yearly_total_entries = 0
 
             for m in range(1, 13):
-                try:
-                    month_start = date(year, m, 1)
-                    next_month_start = date(year + 1, 1, 1) if m == 12 else date(year, m + 1, 1)
-                    month_end = next_month_start - timedelta(days=1)
-                except ValueError:
-                    continue
-
-                qs = TaskList.objects.filter(date__range=[month_start, month_end])
-                if not user.is_staff:
-                    qs = qs.filter(user=user)
-
-                agg = qs.aggregate(
-                    total_duration=Sum('duration'),
-                    entry_count=Count('id'),
-                    active_days=Count('date', distinct=True)
-                )
-
-                hours = float(agg['total_duration'] or 0.0)
-                entries = agg['entry_count'] or 0
-                active_days_count = agg['active_days'] or 0
+                month_start = date(year, m, 1)
+                totals = month_totals.get((year, m), {'hours': 0.0, 'entries': 0, 'active_days': 0})
 
-                yearly_data.append({
+                month_data = {
                     "month": month_start.strftime("%Y-%m"),
                     "month_name": month_start.strftime("%B"),
-                    "total_hours": f"{hours:.2f}",
-                    "entry_count": entries,
-                    "days_with_entries": active_days_count
-                })
-
-                yearly_total_hours += hours
-                yearly_total_entries += entries
+                    "total_hours": f"{totals['hours']:.2f}",
+                    "entry_count": totals['entries'],
+                    "days_with_entries": totals['active_days']
+                }
 
-            return Response({
+                if group_by:
+                    groups = sorted(breakdowns.get((year, m), {}).values(), key=lambda g: g['hours'], reverse=True)
+                    month_data["breakdown"] = [
+                        {
+                            f"{group_by}_id": g['id'],
+                            f"{group_by}_name": g['name'],
+                            "total_hours": f"{g['hours']:.2f}",
+                            "entry_count": g['entries'],
+                            "days_with_entries": g['active_days'],
+                        }
+                        for g in groups
+                    ]
+
+                yearly_data.append(month_data)
+                yearly_total_hours += totals['hours']
+                yearly_total_entries += totals['entries']
+
+            response = {
                 "status": "success",
                 "view": "year",
                 "year": str(year),
                 "total_hours": f"{yearly_total_hours:.2f}",
                 "total_entries": yearly_total_entries,
                 "months": yearly_data
-            })
-            
+            }
+            if group_by:
+                response["group_by"] = group_by
+            return Response(response)
+
+    @staticmethod
+    def _month_key(value):
+        return (value.year, value.month)
+
 # Time Distribution by Task
 # Top Members by Hours
 from rest_framework.views import APIView
@@ -938,69 +1467,46 @@ class TopMembersAPIView(APIView):
     
     Query params:
     - limit: number of top members (default 10, max 50)
-    - period: overall / today (default: overall)
+    - period: overall / today / week / month / custom (default: overall)
+    - start_date, end_date: required when period=custom (YYYY-MM-DD)
+
+    Rankings are served from the leaderboard cache; the X-Cache response
+    header is HIT or MISS.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        limit = min(int(request.query_params.get('limit', 10)), 50)
+        limit = min(int(request.query_params.get('limit', 10)), leaderboard.MAX_LIMIT)
         period = request.query_params.get('period', 'overall').lower()
 
         today = timezone.now().date()
 
-        # Base queryset: all tasks (adjust status filter if you only want completed)
-        qs = TaskList.objects.all()
-
-        # Date filter
-        if period == 'today':
-            qs = qs.filter(date=today)
-        elif period == 'overall':
-            pass  # all time
-        else:
-            return Response({"error": "Invalid period. Use: overall / today"}, status=400)
-
-        if not request.user.is_staff:
-            qs = qs.filter(user=request.user)
-
-        # Aggregate: total duration (decimal) + task count per user
-        top_members = qs.values(
-            'user__id',
-            'user__name',
-            'user__firstname',
-            'user__email'
-        ).annotate(
-            total_duration=Sum('duration', default=0),
-            task_count=Count('id')
-        ).order_by('-total_duration')[:limit]
-
-        # Format result with hrs + mins
-        result = []
-        rank = 1
-        for row in top_members:
-            total_hours_decimal = float(row['total_duration'] or 0)  # decimal → float
-            hours = int(total_hours_decimal)
-            minutes = int((total_hours_decimal - hours) * 60)
-
-            name = row['user__firstname'] or row['user__name'] or "Unknown User"
-            username = row['user__name'] or row['user__email'] or "N/A"
-
-            result.append({
-                "rank": rank,
-                "user_id": row['user__id'],
-                "name": name,
-                "username": username,
-                "total_time": f"{hours} hrs {minutes} mins",
-                "total_hours_decimal": f"{total_hours_decimal:.2f}",
-                "task_count": row['task_count']
-            })
-            rank += 1
+        try:
+            start, end = leaderboard.period_range(
+                period,
+                today,
+                request.query_params.get('start_date'),
+                request.query_params.get('end_date'),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
-        total_members = User.objects.filter(is_active=True).count()
+        data, cache_hit = leaderboard.get_leaderboard(
+            period, start, end,
+            user=None if request.user.is_staff else request.user
+        )
+        result = data['top_members'][:limit]
 
-        return Response({
+        payload = {
             "status": "success",
-            "total_members_in_system": total_members,
+            "total_members_in_system": data['total_members_in_system'],
             "period": period.capitalize(),
             "top_members_count": len(result),
             "top_members": result
-        })
\ No newline at end of file
+        }
+        if start and end:
+            payload["date_range"] = f"{start.isoformat()} to {end.isoformat()}"
+
+        response = Response(payload)
+        response['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+        return response
@@ -0,0 +1,184 @@
+# middleware.py
+"""
+Per-request instrumentation.
+
+RequestMetricsMiddleware counts the queries each request runs on the default
+database and how long they take, and times the request as a whole, the JSON
+rendering of DRF responses ("render", after the view has returned) and the
+serializer work views wrap in `measure_serialization()` ("serialize", part of
+the view's own time; queries it triggers are counted in "db" as well). The
+numbers are
+
+  * returned in a `Server-Timing` header: never by default, to staff users
+    with REQUEST_METRICS_SERVER_TIMING = 'staff', to every client with True,
+  * aggregated per endpoint in process memory, readable by staff at
+    GET /metrics/requests/ (see time_Sheet.views.RequestStatsAPIView),
+  * logged as a warning when a request is slower than
+    REQUEST_METRICS_SLOW_MS or runs more than REQUEST_METRICS_MAX_QUERIES
+    queries.
+
+Streaming responses are measured up to the point the response is returned;
+queries made while the body is being streamed are not counted.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class _RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'render_started', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def measure_serialization(request):
+    """Count the wrapped block (typically `serializer.data`) as serialization time."""
+    metrics = getattr(request, '_request_metrics', None)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serialize_time += time.perf_counter() - started
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    route = match.route if match else '<unmatched>'
+    return f"{request.method} /{route}"
+
+
+def _record(endpoint, metrics, total):
+    with _stats_lock:
+        entry = _stats.get(endpoint)
+        if entry is None:
+            entry = _stats[endpoint] = {
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'db_ms': 0.0,
+                'serialize_ms': 0.0,
+                'render_ms': 0.0,
+                'queries': 0,
+                'max_queries': 0,
+                'slow': 0,
+            }
+        entry['count'] += 1
+        entry['total_ms'] += total * 1000
+        entry['max_ms'] = max(entry['max_ms'], total * 1000)
+        entry['db_ms'] += metrics.db_time * 1000
+        entry['serialize_ms'] += metrics.serialize_time * 1000
+        entry['render_ms'] += metrics.render_time * 1000
+        entry['queries'] += metrics.queries
+        entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+        if total * 1000 >= getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000):
+            entry['slow'] += 1
+
+
+def get_stats():
+    """Per-endpoint aggregates, slowest (by total time spent) first."""
+    with _stats_lock:
+        snapshot = {endpoint: dict(entry) for endpoint, entry in _stats.items()}
+
+    rows = []
+    for endpoint, entry in snapshot.items():
+        count = entry['count']
+        rows.append({
+            'endpoint': endpoint,
+            'count': count,
+            'avg_ms': round(entry['total_ms'] / count, 2),
+            'max_ms': round(entry['max_ms'], 2),
+            'avg_db_ms': round(entry['db_ms'] / count, 2),
+            'avg_serialize_ms': round(entry['serialize_ms'] / count, 2),
+            'avg_render_ms': round(entry['render_ms'] / count, 2),
+            'avg_queries': round(entry['queries'] / count, 2),
+            'max_queries': entry['max_queries'],
+            'slow_requests': entry['slow'],
+            'total_ms': round(entry['total_ms'], 2),
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _server_timing_allowed(request):
+    mode = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', False)
+    if mode == 'staff':
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_authenticated and user.is_staff)
+    return mode is True
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _RequestMetrics()
+        request._request_metrics = metrics
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        endpoint = endpoint_name(request)
+        _record(endpoint, metrics, total)
+
+        if _server_timing_allowed(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+                f'render;dur={metrics.render_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)
+        max_queries = getattr(settings, 'REQUEST_METRICS_MAX_QUERIES', 50)
+        if total * 1000 >= slow_ms or metrics.queries > max_queries:
+            logger.warning(
+                "%s took %.1f ms with %d queries (%.1f ms in db, %.1f ms serializing, %.1f ms rendering)",
+                endpoint, total * 1000, metrics.queries,
+                metrics.db_time * 1000, metrics.serialize_time * 1000, metrics.render_time * 1000,
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Responses are rendered right after this hook returns
+        metrics = request._request_metrics
+        metrics.render_started = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_time = time.perf_counter() - metrics.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
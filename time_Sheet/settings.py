@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',            # full-text search / trigram indexes
     'rest_framework',                     # DRF
     'rest_framework_simplejwt',           # ← add this for JWT
     'corsheaders',
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MIDDLEWARE = [
+    'time_Sheet.middleware.RequestMetricsMiddleware',     # query count / latency, Server-Timing
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -59,6 +61,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests slower than this, or running more queries, are logged as warnings
+REQUEST_METRICS_SLOW_MS = 1000
+REQUEST_METRICS_MAX_QUERIES = 50
+REQUEST_METRICS_SERVER_TIMING = 'staff'    # Server-Timing header only for staff users
+
 CORS_ALLOWED_ORIGINS = [ 
     "http://localhost:5173", 
 ]
@@ -111,6 +118,24 @@ DATABASES = {
     }
 }
 
+# ────────────────────────────────────────────────
+# Caches
+# ────────────────────────────────────────────────
+
+# 'shared' is seen by every worker process: master-data version counters
+# (ETags, bootstrap, status registry) must live there. Create its table with
+# `manage.py createcachetable`; a Redis/Memcached backend works as well.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_shared_cache',
+    },
+}
+MASTER_VERSION_CACHE = 'shared'
+
 # ────────────────────────────────────────────────
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -123,6 +148,17 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# First entry hashes new passwords; the others can still verify old hashes,
+# which are upgraded on the next login (users.credentials).
+PASSWORD_HASHERS = [
+    'users.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = None     # None → Django's default; measure with benchmark_password_hashers
+
 
 # ────────────────────────────────────────────────
 # Internationalization
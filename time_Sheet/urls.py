@@ -16,10 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
+from .views import RequestStatsAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('task/', include('task.urls')),
     path('master/',include('master.urls')),
+    path('metrics/requests/', RequestStatsAPIView.as_view(), name='request-stats'),
 ]
@@ -0,0 +1,22 @@
+# views.py
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+
+from .middleware import get_stats, reset_stats
+
+
+class RequestStatsAPIView(APIView):
+    """
+    GET    /metrics/requests/   → per-endpoint latency / query stats of this process
+    DELETE /metrics/requests/   → reset them
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
+
+    def delete(self, request):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,46 @@
+# credentials.py
+"""
+Every password hash is made and checked here.
+
+`verify()` is check_password() with a setter: when the stored hash was made
+by a hasher that is no longer preferred, or with a different work factor,
+it is replaced by a fresh hash while the raw password is at hand. Nothing
+is rehashed otherwise.
+
+The hashers come from PASSWORD_HASHERS, first one preferred; see
+users.hashers for the configurable PBKDF2 work factor.
+"""
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils import timezone
+
+
+def hash_password(raw_password):
+    return make_password(raw_password)
+
+
+def set_password(user, raw_password):
+    """Hash `raw_password` into `user`; returns the fields to save."""
+    user.password = make_password(raw_password)
+    user.password_last_update = timezone.now()
+    return ['password', 'password_last_update']
+
+
+def verify(user, raw_password):
+    """True if `raw_password` matches; an outdated hash is upgraded and saved."""
+    def upgrade(raw_password):
+        user.password = make_password(raw_password)
+        if user.pk:
+            user.save(update_fields=['password'])
+
+    return check_password(raw_password, user.password, setter=upgrade)
+
+
+def ensure_password(user, raw_password):
+    """
+    Make `user` accept `raw_password` (verified elsewhere, e.g. by the
+    directory). Returns the fields to save; empty when the stored hash
+    already matches.
+    """
+    if verify(user, raw_password):
+        return []
+    return set_password(user, raw_password)
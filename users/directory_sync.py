@@ -0,0 +1,141 @@
+# directory_sync.py
+"""
+Copy user attributes from Active Directory into `users`.
+
+LoginView only verifies passwords; names, e-mail, phones, department and
+manager are kept current by the `sync_directory_users` command, which pages
+through the directory and writes the rows that changed with bulk_update().
+
+Only users that already exist locally are updated; accounts are still
+created by their first login. The manager is stored as the local id of the
+user whose `user_dn` is the entry's `manager` DN (users_id_supervisor, 0
+when unknown).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from master.models import Department
+from . import profile
+from .models import User
+
+# Columns written by the sync; date_sync is only touched on changed rows
+SYNC_FIELDS = [
+    'email', 'firstname', 'realname', 'phone', 'mobile', 'department',
+    'registration_number', 'user_dn', 'users_id_supervisor', 'is_deleted_ldap',
+]
+
+
+def _first(entry, attribute, default=""):
+    values = entry.get(attribute) or [default]
+    return values[0]
+
+
+def department_map():
+    """{lower-cased department name: Department}"""
+    return {department.name.lower(): department for department in Department.objects.all()}
+
+
+def user_attributes(entry, departments):
+    """Local User field values for a decoded directory entry (manager excluded)."""
+    display_name = _first(entry, "displayName")
+    upn = _first(entry, "userPrincipalName")
+    department_name = _first(entry, "department")
+
+    return {
+        'email': _first(entry, "mail") or None,
+        'firstname': _first(entry, "givenName") or (display_name.split()[0] if display_name else ""),
+        'realname': display_name or upn.split("@")[0],
+        'phone': _first(entry, "telephoneNumber") or _first(entry, "mobile"),
+        'mobile': _first(entry, "mobile") or _first(entry, "telephoneNumber"),
+        'department': departments.get(department_name.lower()) if department_name else None,
+        'registration_number': _first(entry, "employeeID") or None,
+        'user_dn': _first(entry, "distinguishedName") or None,
+        'is_deleted_ldap': False,
+    }
+
+
+def _apply(user, values):
+    """Set `values` on `user`; returns True if anything changed."""
+    changed = False
+    for field, value in values.items():
+        if field == 'department':
+            if user.department_id != (value.id if value else None):
+                user.department = value
+                changed = True
+        elif getattr(user, field) != value:
+            setattr(user, field, value)
+            changed = True
+    return changed
+
+
+def _save(users, batch_size):
+    now = timezone.now()
+    for user in users:
+        user.date_sync = now
+    with transaction.atomic():
+        User.objects.bulk_update(users, SYNC_FIELDS + ['date_sync'], batch_size=batch_size)
+    for user in users:
+        profile.invalidate(user.id)
+
+
+def sync_users(client, page_size=500, batch_size=500, mark_missing=False):
+    """
+    Update local users from the directory. Returns counters:
+    {"seen", "matched", "updated", "missing"}.
+    """
+    departments = department_map()
+    local = {
+        user.name.lower(): user
+        for user in User.objects.filter(name__isnull=False).only('id', 'name', 'is_ldap_user', *SYNC_FIELDS)
+    }
+    by_id = {user.id: user for user in local.values()}
+
+    stats = {'seen': 0, 'matched': 0, 'updated': 0, 'missing': 0}
+    managers = {}
+    seen_ids = set()
+    updated_ids = set()
+    pending = []
+
+    for entry in client.iter_users(page_size=page_size):
+        stats['seen'] += 1
+        user = local.get(_first(entry, "userPrincipalName").lower())
+        if user is None:
+            continue
+
+        stats['matched'] += 1
+        seen_ids.add(user.id)
+        managers[user.id] = _first(entry, "manager")
+        if _apply(user, user_attributes(entry, departments)):
+            pending.append(user)
+            if len(pending) >= batch_size:
+                _save(pending, batch_size)
+                updated_ids.update(user.id for user in pending)
+                pending = []
+
+    # Managers are resolved once every DN is known
+    ids_by_dn = {user.user_dn.lower(): user.id for user in local.values() if user.user_dn}
+    pending_ids = {user.id for user in pending}
+    for user_id, manager_dn in managers.items():
+        user = by_id[user_id]
+        supervisor = ids_by_dn.get(manager_dn.lower(), 0) if manager_dn else 0
+        if user.users_id_supervisor != supervisor:
+            user.users_id_supervisor = supervisor
+            if user.id not in pending_ids:
+                pending.append(user)
+                pending_ids.add(user.id)
+
+    if mark_missing:
+        for user in local.values():
+            if user.id not in seen_ids and user.is_ldap_user and not user.is_deleted_ldap:
+                user.is_deleted_ldap = True
+                stats['missing'] += 1
+                if user.id not in pending_ids:
+                    pending.append(user)
+                    pending_ids.add(user.id)
+
+    for start in range(0, len(pending), batch_size):
+        _save(pending[start:start + batch_size], batch_size)
+    updated_ids.update(user.id for user in pending)
+
+    stats['updated'] = len(updated_ids)
+    return stats
@@ -0,0 +1,16 @@
+# hashers.py
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the work factor taken from
+    PASSWORD_PBKDF2_ITERATIONS (Django's default when unset). Stored hashes
+    with a different count are rehashed on the user's next successful login;
+    `manage.py benchmark_password_hashers` shows what a count costs.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or hashers.PBKDF2PasswordHasher.iterations
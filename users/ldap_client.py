@@ -0,0 +1,310 @@
+# ldap_client.py
+"""
+Active Directory access for LoginView.
+
+  * Passwords are verified on a short-lived connection of their own: bind as
+    the user, unbind. A connection bound as a user is never reused.
+  * Directory profiles are looked up on a small pool of connections bound
+    once with the service account (LDAP_BIND_DN / LDAP_BIND_PASSWORD) and
+    cached per UPN for LDAP_PROFILE_CACHE_TTL seconds. Without a service
+    account the lookup runs on the user's own bind, as it always did.
+  * LDAP_NETWORK_TIMEOUT and LDAP_TIMEOUT bound every connect and operation.
+  * After LDAP_BREAKER_THRESHOLD consecutive directory failures the circuit
+    opens for LDAP_BREAKER_COOLDOWN seconds: calls fail fast with
+    DirectoryUnavailable and LoginView authenticates against the local
+    database instead. When the cool-down ends one trial call is let through.
+
+Pool and breaker state is per process.
+"""
+import binascii
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import ldap
+import ldap.filter
+from ldap.controls import SimplePagedResultsControl
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ATTRIBUTES = [
+    "displayName", "givenName", "sn", "mail", "userPrincipalName",
+    "employeeID", "department", "title", "telephoneNumber", "mobile",
+    "company", "manager", "memberOf", "distinguishedName", "description",
+    "whenCreated", "lastLogon", "accountExpires", "userAccountControl"
+]
+
+
+class DirectoryUnavailable(Exception):
+    """The directory could not be asked; fall back to local authentication."""
+
+
+def _decode(value):
+    if not isinstance(value, bytes):
+        return value
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return binascii.hexlify(value).decode('utf-8')
+
+
+def decode_entry(data):
+    return {key: [_decode(v) for v in values] for key, values in data.items()}
+
+
+def _unbind(conn):
+    try:
+        conn.unbind_s()
+    except ldap.LDAPError:
+        pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, cooldown, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self.clock() - self._opened_at < self.cooldown:
+                return False
+            # Half-open: let a single call find out whether the server is back
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                if self._opened_at is None or self._trial:
+                    logger.warning("LDAP circuit opened after %d failures", self._failures)
+                self._opened_at = self.clock()
+                self._trial = False
+
+
+class ConnectionPool:
+    """At most `size` service connections, created lazily and reused LIFO."""
+
+    def __init__(self, connect, size, timeout):
+        self.connect = connect
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise DirectoryUnavailable("No free LDAP connection")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self.connect()
+            try:
+                yield conn
+            except BaseException:
+                # The connection may be half broken; never hand it out again
+                _unbind(conn)
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def clear(self):
+        while True:
+            try:
+                _unbind(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class DirectoryClient:
+    def __init__(self, uri, base_dn, bind_dn=None, bind_password=None, pool_size=4,
+                 network_timeout=3, timeout=5, profile_ttl=300, breaker=None, initialize=None):
+        self.uri = uri
+        self.base_dn = base_dn
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.network_timeout = network_timeout
+        self.timeout = timeout
+        self.profile_ttl = profile_ttl
+        self.breaker = breaker or CircuitBreaker(threshold=5, cooldown=30)
+        self.initialize = initialize or ldap.initialize
+        self.pool = ConnectionPool(self._service_connection, pool_size, timeout) if bind_dn else None
+
+    # ─── connections ─────────────────────────────────────────────────
+
+    def _open(self):
+        conn = self.initialize(self.uri)
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, self.network_timeout)
+        conn.set_option(ldap.OPT_TIMEOUT, self.timeout)
+        return conn
+
+    def _service_connection(self):
+        conn = self._open()
+        try:
+            conn.simple_bind_s(self.bind_dn, self.bind_password)
+        except BaseException:
+            _unbind(conn)
+            raise
+        return conn
+
+    # ─── profiles ────────────────────────────────────────────────────
+
+    def _cache_key(self, upn):
+        return f"users:ldap:profile:{upn.lower()}"
+
+    def _search(self, conn, upn):
+        search_filter = f"(&(objectClass=user)(userPrincipalName={ldap.filter.escape_filter_chars(upn)}))"
+        result = conn.search_s(self.base_dn, ldap.SCOPE_SUBTREE, search_filter, PROFILE_ATTRIBUTES)
+        # AD appends referral entries without a DN
+        entries = [attrs for dn, attrs in result or [] if dn]
+        return decode_entry(entries[0]) if entries else None
+
+    def _pooled_search(self, upn):
+        try:
+            with self.pool.connection() as conn:
+                return self._search(conn, upn)
+        except (ldap.SERVER_DOWN, ldap.TIMEOUT):
+            # An idle pooled connection may have been closed by the server;
+            # retry once on a fresh one before counting a failure
+            with self.pool.connection() as conn:
+                return self._search(conn, upn)
+
+    def _profile(self, upn, search):
+        key = self._cache_key(upn)
+        profile = cache.get(key)
+        if profile is None:
+            profile = search()
+            if profile is not None:
+                cache.set(key, profile, self.profile_ttl)
+        return profile
+
+    def _authenticate(self, upn, password):
+        conn = self._open()
+        try:
+            conn.simple_bind_s(upn, password)
+            if self.pool is None:
+                return self._profile(upn, lambda: self._search(conn, upn))
+        finally:
+            _unbind(conn)
+        return self._profile(upn, lambda: self._pooled_search(upn))
+
+    def authenticate(self, upn, password):
+        """
+        Decoded directory attributes of `upn`, or None when the directory
+        rejects the credentials or has no such user. Raises
+        DirectoryUnavailable when the directory cannot be reached.
+        """
+        if not password:
+            # An empty password would be an anonymous bind, which succeeds
+            return None
+        if not self.breaker.allow():
+            raise DirectoryUnavailable("LDAP circuit is open")
+
+        try:
+            profile = self._authenticate(upn, password)
+        except ldap.INVALID_CREDENTIALS:
+            self.breaker.success()
+            return None
+        except DirectoryUnavailable:
+            raise
+        except ldap.LDAPError as e:
+            self.breaker.failure()
+            raise DirectoryUnavailable(str(e)) from e
+
+        self.breaker.success()
+        return profile
+
+    def iter_users(self, page_size=500):
+        """
+        Every user entry under base_dn, decoded, fetched with the paged
+        results control `page_size` entries at a time. Needs the service
+        account; LDAP errors are raised as they are.
+        """
+        if self.pool is None:
+            raise DirectoryUnavailable("Listing the directory needs LDAP_BIND_DN")
+
+        control = SimplePagedResultsControl(True, size=page_size, cookie='')
+        with self.pool.connection() as conn:
+            while True:
+                msgid = conn.search_ext(
+                    self.base_dn, ldap.SCOPE_SUBTREE,
+                    "(&(objectClass=user)(userPrincipalName=*))",
+                    PROFILE_ATTRIBUTES, serverctrls=[control]
+                )
+                _, data, _, controls = conn.result3(msgid)
+                for dn, attrs in data:
+                    if dn:
+                        yield decode_entry(attrs)
+
+                control.cookie = next(
+                    (c.cookie for c in controls if c.controlType == SimplePagedResultsControl.controlType),
+                    None
+                )
+                if not control.cookie:
+                    return
+
+    def forget(self, upn):
+        cache.delete(self._cache_key(upn))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide DirectoryClient, configured from settings."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DirectoryClient(
+                uri=getattr(settings, 'LDAP_SERVER_URI', "ldap://172.31.46.129:389"),
+                base_dn=getattr(settings, 'LDAP_BASE_DN', "dc=qatarmedicalcenter,dc=com"),
+                bind_dn=getattr(settings, 'LDAP_BIND_DN', None),
+                bind_password=getattr(settings, 'LDAP_BIND_PASSWORD', None),
+                pool_size=getattr(settings, 'LDAP_POOL_SIZE', 4),
+                network_timeout=getattr(settings, 'LDAP_NETWORK_TIMEOUT', 3),
+                timeout=getattr(settings, 'LDAP_TIMEOUT', 5),
+                profile_ttl=getattr(settings, 'LDAP_PROFILE_CACHE_TTL', 5 * 60),
+                breaker=CircuitBreaker(
+                    threshold=getattr(settings, 'LDAP_BREAKER_THRESHOLD', 5),
+                    cooldown=getattr(settings, 'LDAP_BREAKER_COOLDOWN', 30),
+                ),
+            )
+        return _client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Time hashing and verifying a password with each configured hasher "
+        "(PASSWORD_HASHERS) on this machine. Pass --iterations to compare PBKDF2 "
+        "work factors before setting PASSWORD_PBKDF2_ITERATIONS."
+    )
+
+    password = "correct horse battery staple"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=5,
+            help="Hashes timed per hasher; the median is reported"
+        )
+        parser.add_argument(
+            '--iterations', type=int, nargs='*', default=[],
+            help="Extra PBKDF2-SHA256 iteration counts to time"
+        )
+
+    def _time(self, hasher, rounds):
+        hash_times, verify_times = [], []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            encoded = hasher.encode(self.password, hasher.salt())
+            hash_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            hasher.verify(self.password, encoded)
+            verify_times.append(time.perf_counter() - started)
+        return statistics.median(hash_times) * 1000, statistics.median(verify_times) * 1000
+
+    def _report(self, label, hasher, rounds):
+        try:
+            hash_ms, verify_ms = self._time(hasher, rounds)
+        except ValueError as e:
+            # Argon2 / bcrypt without their libraries installed
+            self.stdout.write(f"{label:<45} skipped: {e}")
+            return
+        self.stdout.write(f"{label:<45} hash {hash_ms:8.1f} ms   verify {verify_ms:8.1f} ms")
+
+    def handle(self, *args, **options):
+        rounds = max(1, options['rounds'])
+
+        for position, hasher in enumerate(hashers.get_hashers()):
+            label = hasher.algorithm
+            work = getattr(hasher, 'iterations', None)
+            if work:
+                label += f" ({work} iterations)"
+            if position == 0:
+                label += " *"
+            self._report(label, hasher, rounds)
+
+        for iterations in options['iterations']:
+            hasher = hashers.PBKDF2PasswordHasher()
+            hasher.iterations = iterations
+            self._report(f"pbkdf2_sha256 ({iterations} iterations)", hasher, rounds)
+
+        self.stdout.write(f"* preferred hasher (PASSWORD_PBKDF2_ITERATIONS={getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None)})")
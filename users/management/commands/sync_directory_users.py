@@ -0,0 +1,43 @@
+import ldap
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.directory_sync import sync_users
+from users.ldap_client import DirectoryUnavailable, get_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Update local users (e-mail, names, phones, department, manager) from "
+        "Active Directory. Schedule it, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=getattr(settings, 'LDAP_SYNC_PAGE_SIZE', 500),
+            help="Directory entries fetched per LDAP page"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Users written per bulk_update"
+        )
+        parser.add_argument(
+            '--mark-missing', action='store_true',
+            help="Flag directory users no longer found in the directory (is_deleted_ldap)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = sync_users(
+                get_client(),
+                page_size=options['page_size'],
+                batch_size=options['batch_size'],
+                mark_missing=options['mark_missing'],
+            )
+        except (DirectoryUnavailable, ldap.LDAPError) as e:
+            raise CommandError(f"Directory sync failed: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['seen']} directory entries, {stats['matched']} local users, "
+            f"{stats['updated']} updated, {stats['missing']} marked missing"
+        ))
@@ -6,6 +6,7 @@ from django.conf import settings
 from master.models import Entity
 from django.utils import timezone
 from datetime import datetime
+from . import credentials
 
 # Create your models here.
 class UserManager(BaseUserManager):
@@ -14,7 +15,7 @@ class UserManager(BaseUserManager):
             raise ValueError("The Name field must be set")
         user = self.model(name=name, **extra_fields)
         if password:
-            user.set_password(password)  # hashes password
+            credentials.set_password(user, password)  # hashes password
         else:
             user.set_unusable_password()
         user.save(using=self._db)
@@ -0,0 +1,252 @@
+# profile.py
+"""
+User profile payloads for login and `me`, with a per-user cache.
+
+`get_profile(user)` returns the compact profile the frontend needs;
+`get_profile(user, full=True)` the legacy login shape with every User column.
+Entities and roles are fetched with one `id__in` query each.
+
+Profiles are cached per user (USER_PROFILE_CACHE_TTL seconds) in the cache
+shared by all workers (master.versioning.get_cache), so an invalidation is
+seen by every process. Call `invalidate(user_id)` after changing a user or
+their role mappings; renaming an entity, role, department or location
+retires cached profiles through the master data version counters. The
+timestamps in VOLATILE_FIELDS change on every login or directory sync and
+are always read from the user, never from the cache.
+"""
+import time
+
+from django.conf import settings
+
+from master.models import Entity, Role, Department, Location
+from master.versioning import get_cache, get_versions
+from .models import UserRoleMapping
+
+# Master tables whose names are copied into the profile
+MASTER_MODELS = (Entity, Role, Department, Location)
+
+# Full-profile fields written without an invalidation (login, directory sync)
+VOLATILE_FIELDS = ('last_login', 'date_mod', 'date_sync')
+
+
+def _generation_key(user_id):
+    return f"users:profile:{user_id}:generation"
+
+
+def _generation(user_id):
+    cache = get_cache()
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        cache.add(_generation_key(user_id), time.time_ns(), None)
+        generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+def _key(user_id, variant):
+    generation = _generation(user_id)
+    versions = get_versions(MASTER_MODELS)
+    counters = '-'.join(str(versions[model]) for model in MASTER_MODELS)
+    return f"users:profile:{user_id}:{generation}:{variant}:{counters}"
+
+
+def invalidate(user_id):
+    """Drop every cached profile variant of a user."""
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.set(_generation_key(user_id), time.time_ns(), None)
+
+
+def get_profile(user, full=False):
+    cache = get_cache()
+    key = _key(user.id, 'full' if full else 'compact')
+    data = cache.get(key)
+    if data is None:
+        data = build_profile(user, full=full)
+        cached = {**data, **dict.fromkeys(VOLATILE_FIELDS)} if full else data
+        cache.set(key, cached, getattr(settings, 'USER_PROFILE_CACHE_TTL', 15 * 60))
+    elif full:
+        data = {**data, **{field: getattr(user, field, None) for field in VOLATILE_FIELDS}}
+    return data
+
+
+def _entities(user):
+    ids = list(getattr(user, 'entities_ids', None) or [])
+    found = Entity.objects.in_bulk(ids) if ids else {}
+    return [
+        {
+            "id": ent.id,
+            "name": ent.name,
+            "display_name": getattr(ent, "display_name", ent.name),
+            "logo": getattr(ent, 'logo', None).url if hasattr(ent, 'logo') and ent.logo else None,
+        }
+        for ent in (found.get(eid) for eid in ids)
+        if ent is not None
+    ]
+
+
+def _roles(user):
+    ids = list(getattr(user, 'roles_ids', None) or [])
+    if not ids:
+        return [{"id": None, "name": "user"}]
+    found = Role.objects.in_bulk(ids)
+    return [{"id": rol.id, "name": rol.name} for rol in (found.get(rid) for rid in ids) if rol is not None]
+
+
+def _role_mappings(user):
+    return [
+        {
+            "id": m.id,
+            "role_id": m.role_id,
+            "role_name": m.role.name,
+            "user_id": m.user_id,
+            "created_at": m.created_at,
+            "updated_at": m.updated_at,
+        }
+        for m in UserRoleMapping.objects.filter(user=user).select_related("role")
+    ]
+
+
+def build_profile(user, full=False):
+    entities = _entities(user)
+    roles = _roles(user)
+    role_mappings = _role_mappings(user)
+
+    if full:
+        return _full_user_data(user, entities, roles, role_mappings)
+
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "firstname": user.firstname or "",
+        "realname": user.realname or "",
+        "department": user.department.name if user.department_id else "",
+        "location": user.location.name if user.location_id else "",
+        "entities_ids": user.entities_ids,
+        "roles_ids": user.roles_ids,
+        "entities": entities,
+        "roles": roles,
+        "role_mappings": [
+            {"id": m["id"], "role_id": m["role_id"], "role_name": m["role_name"]}
+            for m in role_mappings
+        ],
+        "force_password_change": user.force_password_change,
+        "is_active": user.is_active,
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+        "is_manager": user.is_manager,
+        "is_hod": user.is_hod,
+        "is_ldap_user": user.is_ldap_user,
+        "language": user.language or "",
+        "timezone": user.timezone or "",
+    }
+
+
+def _full_user_data(user, entities, roles, role_mappings):
+    """The original login payload (`?expand=full`)."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "employee_id": getattr(user, 'employee_id', None),           # Employer number from AD
+        "email": user.email,
+        "firstname": getattr(user, 'firstname', ""),
+        "realname": getattr(user, 'realname', ""),
+        "phone": getattr(user, 'phone', ""),                         # Phone from AD
+        "phone2": getattr(user, 'phone2', ""),
+        "mobile": getattr(user, 'mobile', ""),                       # Mobile from AD
+        "department": getattr(user, 'department', {}).name if getattr(user, 'department', None) else "",
+        "location": getattr(user, 'location', {}).name if getattr(user, 'location', None) else "",
+        "entities_ids": getattr(user, 'entities_ids', []),
+        "roles_ids": getattr(user, 'roles_ids', []),
+        "entities": entities,
+        "roles": roles,
+        "role_mappings": role_mappings,
+        "force_password_change": getattr(user, 'force_password_change', False),
+        "is_active": getattr(user, 'is_active', True),
+        "is_deleted": getattr(user, 'is_deleted', False),
+        "is_ldap_user": getattr(user, 'is_ldap_user', False),
+        "is_staff": getattr(user, 'is_staff', False),
+        "is_superuser": getattr(user, 'is_superuser', False),
+
+        # Safe defaults for all other fields in your model
+        "language": getattr(user, 'language', ""),
+        "use_mode": getattr(user, 'use_mode', 0),
+        "list_limit": getattr(user, 'list_limit', None),
+        "comment": getattr(user, 'comment', ""),
+        "auths_id": getattr(user, 'auths_id', 0),
+        "authtype": getattr(user, 'authtype', 0),
+        "last_login": getattr(user, 'last_login', None),
+        "date_mod": getattr(user, 'date_mod', None),
+        "date_sync": getattr(user, 'date_sync', None),
+        "profiles_id": getattr(user, 'profiles_id', 0),
+        "usertitles_id": getattr(user, 'usertitles_id', 0),
+        "usercategories_id": getattr(user, 'usercategories_id', 0),
+        "date_format": getattr(user, 'date_format', None),
+        "number_format": getattr(user, 'number_format', None),
+        "names_format": getattr(user, 'names_format', None),
+        "csv_delimiter": getattr(user, 'csv_delimiter', ""),
+        "is_ids_visible": getattr(user, 'is_ids_visible', None),
+        "use_flat_dropdowntree": getattr(user, 'use_flat_dropdowntree', None),
+        "show_jobs_at_login": getattr(user, 'show_jobs_at_login', None),
+        "priority_1": getattr(user, 'priority_1', ""),
+        "priority_2": getattr(user, 'priority_2', ""),
+        "priority_3": getattr(user, 'priority_3', ""),
+        "priority_4": getattr(user, 'priority_4', ""),
+        "priority_5": getattr(user, 'priority_5', ""),
+        "priority_6": getattr(user, 'priority_6', ""),
+        "followup_private": getattr(user, 'followup_private', None),
+        "task_private": getattr(user, 'task_private', None),
+        "default_requesttypes_id": getattr(user, 'default_requesttypes_id', None),
+        "password_forget_token": getattr(user, 'password_forget_token', ""),
+        "password_forget_token_date": getattr(user, 'password_forget_token_date', None),
+        "user_dn": getattr(user, 'user_dn', ""),
+        "registration_number": getattr(user, 'registration_number', ""),
+        "show_count_on_tabs": getattr(user, 'show_count_on_tabs', None),
+        "refresh_views": getattr(user, 'refresh_views', None),
+        "set_default_tech": getattr(user, 'set_default_tech', None),
+        "personal_token": getattr(user, 'personal_token', ""),
+        "personal_token_date": getattr(user, 'personal_token_date', None),
+        "api_token": getattr(user, 'api_token', ""),
+        "api_token_date": getattr(user, 'api_token_date', None),
+        "cookie_token": getattr(user, 'cookie_token', ""),
+        "cookie_token_date": getattr(user, 'cookie_token_date', None),
+        "display_count_on_home": getattr(user, 'display_count_on_home', None),
+        "notification_to_myself": getattr(user, 'notification_to_myself', None),
+        "duedateok_color": getattr(user, 'duedateok_color', ""),
+        "duedatewarning_color": getattr(user, 'duedatewarning_color', ""),
+        "duedatecritical_color": getattr(user, 'duedatecritical_color', ""),
+        "duedatewarning_less": getattr(user, 'duedatewarning_less', None),
+        "duedatecritical_less": getattr(user, 'duedatecritical_less', None),
+        "duedatewarning_unit": getattr(user, 'duedatewarning_unit', ""),
+        "duedatecritical_unit": getattr(user, 'duedatecritical_unit', ""),
+        "display_options": getattr(user, 'display_options', ""),
+        "is_deleted_ldap": getattr(user, 'is_deleted_ldap', False),
+        "pdffont": getattr(user, 'pdffont', ""),
+        "picture": getattr(user, 'picture', ""),
+        "begin_date": getattr(user, 'begin_date', None),
+        "end_date": getattr(user, 'end_date', None),
+        "keep_devices_when_purging_item": getattr(user, 'keep_devices_when_purging_item', None),
+        "privatebookmarkorder": getattr(user, 'privatebookmarkorder', ""),
+        "backcreated": getattr(user, 'backcreated', None),
+        "task_state": getattr(user, 'task_state', None),
+        "layout": getattr(user, 'layout', ""),
+        "palette": getattr(user, 'palette', ""),
+        "set_default_requester": getattr(user, 'set_default_requester', None),
+        "lock_autolock_mode": getattr(user, 'lock_autolock_mode', None),
+        "lock_directunlock_notification": getattr(user, 'lock_directunlock_notification', None),
+        "date_creation": getattr(user, 'date_creation', None),
+        "highcontrast_css": getattr(user, 'highcontrast_css', False),
+        "plannings": getattr(user, 'plannings', ""),
+        "sync_field": getattr(user, 'sync_field', ""),
+        "groups_id": getattr(user, 'groups_id', 0),
+        "users_id_supervisor": getattr(user, 'users_id_supervisor', 0),
+        "timezone": getattr(user, 'timezone', ""),
+        "default_dashboard_central": getattr(user, 'default_dashboard_central', ""),
+        "default_dashboard_assets": getattr(user, 'default_dashboard_assets', ""),
+        "default_dashboard_helpdesk": getattr(user, 'default_dashboard_helpdesk', ""),
+        "default_dashboard_mini_ticket": getattr(user, 'default_dashboard_mini_ticket', ""),
+        "player_id": getattr(user, 'player_id', ""),
+        "no_entity_mail_sent": getattr(user, 'no_entity_mail_sent', False),
+    }
@@ -4,7 +4,7 @@ from .models import User  # adjust import path as needed
 from django.utils import timezone
 from .models import User,UserRoleMapping
 from master.models import Entity
-from django.contrib.auth.hashers import make_password
+from . import credentials
 
 
 class WatcherUserSerializer(serializers.ModelSerializer):
@@ -97,9 +97,7 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create(**validated_data)
 
         if password:
-            user.password = make_password(password)
-            user.password_last_update = timezone.now()
-            user.save(update_fields=['password', 'password_last_update'])
+            user.save(update_fields=credentials.set_password(user, password))
 
         return user
 
@@ -112,8 +110,7 @@ class UserSerializer(serializers.ModelSerializer):
 
         # Special handling for password
         if password:
-            instance.password = make_password(password)
-            instance.password_last_update = timezone.now()
+            credentials.set_password(instance, password)
 
         instance.save()
         return instance
@@ -1,3 +1,343 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import ldap
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from master import versioning
+from master.models import Department
+from . import credentials, profile
+from .directory_sync import sync_users
+from .ldap_client import CircuitBreaker, DirectoryClient, DirectoryUnavailable
+from .models import User
+
+
+class StubDirectory:
+    """In-memory stand-in for the AD server, handed to DirectoryClient as `initialize`."""
+
+    service_dn = "CN=svc,DC=example,DC=com"
+    service_password = "svc-secret"
+
+    def __init__(self):
+        self.users = {}
+        self.down = False
+        self.opened = 0
+        self.binds = []
+        self.searches = 0
+        self.pages = 0
+
+    def add_user(self, upn, password, **attrs):
+        entry = {key: [value.encode('utf-8')] for key, value in attrs.items()}
+        entry["userPrincipalName"] = [upn.encode('utf-8')]
+        entry.setdefault("distinguishedName", [f"CN={upn},DC=example,DC=com".encode('utf-8')])
+        self.users[upn] = (password, entry)
+
+    def __call__(self, uri):
+        if self.down:
+            raise ldap.SERVER_DOWN()
+        self.opened += 1
+        return StubConnection(self)
+
+
+class StubConnection:
+    def __init__(self, directory):
+        self.directory = directory
+        self.bound_as = None
+        self.closed = False
+
+    def set_option(self, option, value):
+        pass
+
+    def simple_bind_s(self, who, password):
+        directory = self.directory
+        if directory.down or self.closed:
+            raise ldap.SERVER_DOWN()
+        directory.binds.append(who)
+        if who == directory.service_dn and password == directory.service_password:
+            self.bound_as = who
+            return
+        if who not in directory.users or directory.users[who][0] != password:
+            raise ldap.INVALID_CREDENTIALS()
+        self.bound_as = who
+
+    def search_s(self, base, scope, search_filter, attrs):
+        if self.directory.down or self.closed:
+            raise ldap.SERVER_DOWN()
+        self.directory.searches += 1
+        for upn, (_, entry) in self.directory.users.items():
+            if f"(userPrincipalName={upn})" in search_filter:
+                return [(f"CN={upn},DC=example,DC=com", entry), (None, ["ldap://referral"])]
+        return []
+
+    def search_ext(self, base, scope, search_filter, attrs, serverctrls):
+        self.page_control = serverctrls[0]
+        return 1
+
+    def result3(self, msgid):
+        control = self.page_control
+        entries = [(f"CN={upn},DC=example,DC=com", entry) for upn, (_, entry) in self.directory.users.items()]
+        start = int(control.cookie or 0)
+        end = start + control.size
+        self.directory.pages += 1
+        control = type(control)(True, size=control.size, cookie=str(end) if end < len(entries) else '')
+        return 101, entries[start:end] + [(None, ["ldap://referral"])], msgid, [control]
+
+    def unbind_s(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DirectoryClientTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = StubDirectory()
+        self.directory.add_user("alice@example.com", "pw", displayName="Alice A", mail="alice@example.com")
+        self.clock = FakeClock()
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault("bind_dn", StubDirectory.service_dn)
+        kwargs.setdefault("bind_password", StubDirectory.service_password)
+        return DirectoryClient(
+            uri="ldap://stub", base_dn="DC=example,DC=com",
+            breaker=CircuitBreaker(threshold=2, cooldown=30, clock=self.clock),
+            initialize=self.directory, **kwargs
+        )
+
+    def test_authenticate_returns_decoded_profile(self):
+        profile = self.make_client().authenticate("alice@example.com", "pw")
+        self.assertEqual(profile["displayName"], ["Alice A"])
+        self.assertEqual(profile["mail"], ["alice@example.com"])
+
+    def test_invalid_credentials(self):
+        client = self.make_client()
+        self.assertIsNone(client.authenticate("alice@example.com", "wrong"))
+        self.assertIsNone(client.authenticate("alice@example.com", ""))
+        self.assertFalse(client.breaker.is_open)
+
+    def test_profile_lookups_share_one_service_connection_and_are_cached(self):
+        client = self.make_client()
+        for _ in range(3):
+            client.authenticate("alice@example.com", "pw")
+
+        # Every login binds as the user on its own connection ...
+        self.assertEqual(self.directory.binds.count("alice@example.com"), 3)
+        # ... while the profile was searched once, on one pooled service connection
+        self.assertEqual(self.directory.binds.count(StubDirectory.service_dn), 1)
+        self.assertEqual(self.directory.searches, 1)
+        self.assertEqual(self.directory.opened, 4)
+
+    def test_without_service_account_searches_on_the_user_bind(self):
+        client = self.make_client(bind_dn=None, bind_password=None)
+        self.assertIsNone(client.pool)
+        self.assertEqual(client.authenticate("alice@example.com", "pw")["displayName"], ["Alice A"])
+        self.assertEqual(self.directory.binds, ["alice@example.com"])
+
+    def test_stale_pooled_connection_is_replaced(self):
+        client = self.make_client()
+        client.authenticate("alice@example.com", "pw")
+        cache.clear()
+
+        # The server dropped the idle service connection
+        with client.pool.connection() as conn:
+            conn.closed = True
+
+        self.assertIsNotNone(client.authenticate("alice@example.com", "pw"))
+        self.assertFalse(client.breaker.is_open)
+
+    def test_circuit_opens_and_fails_fast(self):
+        client = self.make_client()
+        self.directory.down = True
+        for _ in range(2):
+            with self.assertRaises(DirectoryUnavailable):
+                client.authenticate("alice@example.com", "pw")
+        self.assertTrue(client.breaker.is_open)
+
+        self.directory.down = False
+        opened = self.directory.opened
+        with self.assertRaises(DirectoryUnavailable):
+            client.authenticate("alice@example.com", "pw")
+        self.assertEqual(self.directory.opened, opened)
+
+        # After the cool-down a trial call goes through and closes the circuit
+        self.clock.now += 31
+        self.assertIsNotNone(client.authenticate("alice@example.com", "pw"))
+        self.assertFalse(client.breaker.is_open)
+
+    def test_failed_trial_reopens_the_circuit(self):
+        client = self.make_client()
+        self.directory.down = True
+        for _ in range(2):
+            with self.assertRaises(DirectoryUnavailable):
+                client.authenticate("alice@example.com", "pw")
+
+        self.clock.now += 31
+        with self.assertRaises(DirectoryUnavailable):
+            client.authenticate("alice@example.com", "pw")
+        self.assertTrue(client.breaker.is_open)
+        self.assertFalse(client.breaker.allow())
+
+
+class DirectorySyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = StubDirectory()
+        self.client = DirectoryClient(
+            uri="ldap://stub", base_dn="DC=example,DC=com",
+            bind_dn=StubDirectory.service_dn, bind_password=StubDirectory.service_password,
+            initialize=self.directory,
+        )
+        self.department = Department.objects.create(name="Finance", created_by=1, modified_by=1)
+        self.boss = User.objects.create(name="boss@example.com", is_ldap_user=True)
+        self.alice = User.objects.create(name="alice@example.com", is_ldap_user=True)
+        self.gone = User.objects.create(name="gone@example.com", is_ldap_user=True)
+
+        self.directory.add_user("boss@example.com", "pw", displayName="The Boss")
+        self.directory.add_user(
+            "Alice@example.com", "pw", displayName="Alice A", mail="alice@example.com",
+            department="finance", manager="CN=boss@example.com,DC=example,DC=com",
+        )
+        self.directory.add_user("stranger@example.com", "pw", displayName="Not local")
+
+    def test_sync_updates_changed_users_in_pages(self):
+        stats = sync_users(self.client, page_size=2, batch_size=1, mark_missing=True)
+        self.assertEqual(stats, {'seen': 3, 'matched': 2, 'updated': 3, 'missing': 1})
+        self.assertEqual(self.directory.pages, 2)
+
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.realname, "Alice A")
+        self.assertEqual(self.alice.email, "alice@example.com")
+        self.assertEqual(self.alice.department, self.department)
+        self.assertEqual(self.alice.users_id_supervisor, self.boss.id)
+        self.assertIsNotNone(self.alice.date_sync)
+
+        self.gone.refresh_from_db()
+        self.assertTrue(self.gone.is_deleted_ldap)
+
+    def test_unchanged_users_are_not_written(self):
+        sync_users(self.client, mark_missing=True)
+        stats = sync_users(self.client, mark_missing=True)
+        self.assertEqual(stats['updated'], 0)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class CredentialsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="carol@example.com")
+        self.user.save(update_fields=credentials.set_password(self.user, "pw"))
+
+    def test_matching_hash_is_not_rewritten(self):
+        stored = self.user.password
+        self.assertEqual(credentials.ensure_password(self.user, "pw"), [])
+        self.assertEqual(self.user.password, stored)
+
+    def test_changed_password_is_rehashed(self):
+        self.assertEqual(credentials.ensure_password(self.user, "new"), ['password', 'password_last_update'])
+        self.assertTrue(credentials.verify(self.user, "new"))
+
+    def test_hash_with_another_work_factor_is_upgraded_on_verify(self):
+        self.assertIn("$1000$", self.user.password)
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertFalse(credentials.verify(self.user, "wrong"))
+            self.user.refresh_from_db()
+            self.assertIn("$1000$", self.user.password)
+
+            self.assertTrue(credentials.verify(self.user, "pw"))
+            self.user.refresh_from_db()
+            self.assertIn("$2000$", self.user.password)
+
+
+@override_settings(LDAP_AUTH=True)
+class LoginFallbackTests(TestCase):
+    url = "/api/login/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            name="bob@qatarmedicalcenter.com", email="bob@example.com",
+            password=make_password("local-pw"), is_ldap_user=True,
+        )
+        self.client = APIClient()
+
+    def login(self, password, error):
+        directory = mock.Mock()
+        directory.authenticate.side_effect = error
+        with mock.patch("users.ldap_client.get_client", return_value=directory):
+            return self.client.post(self.url, {"username": "bob", "password": password}, format="json")
+
+    def test_directory_unavailable_falls_back_to_local_password(self):
+        response = self.login("local-pw", DirectoryUnavailable("down"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Local DB", response.data["message"])
+        self.assertEqual(response.data["user"]["id"], self.user.id)
+
+    def test_local_fallback_checks_the_password(self):
+        response = self.login("wrong", DirectoryUnavailable("down"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_directory_rejection_is_final_for_directory_users(self):
+        response = self.login("local-pw", [None])
+        self.assertEqual(response.status_code, 400)
+
+    def test_directory_login_only_records_last_login(self):
+        self.user.realname = "Synced Name"
+        self.user.save()
+        password_hash = self.user.password
+
+        response = self.login("local-pw", [{"mail": ["bob@example.com"], "displayName": ["Directory Name"]}])
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.realname, "Synced Name")
+        self.assertEqual(self.user.password, password_hash)
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_changed_directory_password_is_rehashed(self):
+        response = self.login("new-pw", [{"mail": ["bob@example.com"]}])
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("new-pw"))
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            name="bob@qatarmedicalcenter.com", email="bob@example.com", password=make_password("local-pw"),
+        )
+
+    def login(self):
+        directory = mock.Mock()
+        directory.authenticate.side_effect = DirectoryUnavailable("down")
+        with mock.patch("users.ldap_client.get_client", return_value=directory):
+            response = APIClient().post(
+                "/api/login/?expand=full", {"username": "bob", "password": "local-pw"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.data["user"]
+
+    def test_every_login_reports_its_own_last_login(self):
+        first = self.login()["last_login"]
+        second = self.login()["last_login"]
+        self.user.refresh_from_db()
+        self.assertNotEqual(second, first)
+        self.assertEqual(second, self.user.last_login)
+
+    def test_invalidation_goes_through_the_shared_cache(self):
+        self.assertFalse(profile.get_profile(self.user)["is_staff"])
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        profile.invalidate(self.user.id)
+
+        self.user.refresh_from_db()
+        self.assertTrue(profile.get_profile(self.user)["is_staff"])
+        key = profile._generation_key(self.user.id)
+        self.assertIsNotNone(versioning.get_cache().get(key))
+        self.assertIsNone(caches['default'].get(key))
@@ -9,6 +9,7 @@ from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 from .models import User,UserRoleMapping
 from .serializers import UserSerializer,UserRoleMappingSerializer
+from . import credentials, directory_sync, ldap_client, profile
 from django.utils import timezone
 
 
@@ -57,6 +58,7 @@ class UserDetailAPIView(APIView):
             # You can set modified_by here
             # serializer.validated_data['modified_by'] = request.user.id
             serializer.save()
+            profile.invalidate(user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -65,6 +67,7 @@ class UserDetailAPIView(APIView):
         serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            profile.invalidate(user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -73,6 +76,7 @@ class UserDetailAPIView(APIView):
         user.is_deleted = True
         user.is_active = False
         user.save(update_fields=['is_deleted', 'is_active'])
+        profile.invalidate(user.id)
         return Response({"detail": "User soft-deleted"}, status=status.HTTP_200_OK)
     
 
@@ -101,7 +105,8 @@ class UserRoleMappingAPIView(APIView):
     def post(self, request):
         serializer = UserRoleMappingSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            mapping = serializer.save()
+            profile.invalidate(mapping.user_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -111,7 +116,11 @@ class UserRoleMappingAPIView(APIView):
         mapping = get_object_or_404(UserRoleMapping, pk=pk)
         serializer = UserRoleMappingSerializer(mapping, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            previous_user_id = mapping.user_id
+            mapping = serializer.save()
+            profile.invalidate(previous_user_id)
+            if mapping.user_id != previous_user_id:
+                profile.invalidate(mapping.user_id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -121,7 +130,11 @@ class UserRoleMappingAPIView(APIView):
         mapping = get_object_or_404(UserRoleMapping, pk=pk)
         serializer = UserRoleMappingSerializer(mapping, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            previous_user_id = mapping.user_id
+            mapping = serializer.save()
+            profile.invalidate(previous_user_id)
+            if mapping.user_id != previous_user_id:
+                profile.invalidate(mapping.user_id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -130,23 +143,20 @@ class UserRoleMappingAPIView(APIView):
             return Response({"error": "ID is required for delete"}, status=status.HTTP_400_BAD_REQUEST)
         mapping = get_object_or_404(UserRoleMapping, pk=pk)
         mapping.delete()
+        profile.invalidate(mapping.user_id)
         return Response({"detail": "Mapping deleted"}, status=status.HTTP_204_NO_CONTENT)
 from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import check_password, make_password
 from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-import ldap
-import binascii
 from django.core.mail import send_mail
 import random
 import string
 from django.utils import timezone
 from .models import User,UserRoleMapping
-from master.models import Entity,Role
 from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.tokens import UntypedToken
 
@@ -167,30 +177,6 @@ def ensure_domain_in_username(username):
         username += domain
     return username
 
-# Helper: Decode LDAP data
-def decode_ldap_data(data):
-    decoded_data = {}
-    for key, value in data.items():
-        if isinstance(value, list):
-            new_values = []
-            for v in value:
-                if isinstance(v, bytes):
-                    try:
-                        new_values.append(v.decode("utf-8"))
-                    except UnicodeDecodeError:
-                        new_values.append(binascii.hexlify(v).decode("utf-8"))
-                else:
-                    new_values.append(v)
-            decoded_data[key] = new_values
-        elif isinstance(value, bytes):
-            try:
-                decoded_data[key] = value.decode("utf-8")
-            except UnicodeDecodeError:
-                decoded_data[key] = binascii.hexlify(value).decode("utf-8")
-        else:
-            decoded_data[key] = value
-    return decoded_data
-
 # ---------------- LOGIN ----------------
 import logging
 
@@ -419,12 +405,6 @@ def ensure_domain_in_username(username):
         return f"{username}@qatarmedicalcenter.com"
     return username
 
-def decode_ldap_data(data):
-    decoded = {}
-    for key, values in data.items():
-        decoded[key] = [v.decode('utf-8') if isinstance(v, bytes) else v for v in values]
-    return decoded
-
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
@@ -441,256 +421,84 @@ class LoginView(APIView):
         ad_raw = {}
 
         # LDAP Authentication + Fetch Rich Profile
+        directory_reachable = False
         if getattr(settings, "LDAP_AUTH", True):
             try:
-                ldap_server = "ldap://172.31.46.129:389"
-                base_dn = "dc=qatarmedicalcenter,dc=com"
-
-                ldap_client = ldap.initialize(ldap_server)
-                ldap_client.set_option(ldap.OPT_REFERRALS, 0)
-                ldap_client.simple_bind_s(username_ad, password)
-
-                search_filter = f"(&(objectClass=user)(userPrincipalName={username_ad}))"
-                attrs = [
-                    "displayName", "givenName", "sn", "mail", "userPrincipalName",
-                    "employeeID", "department", "title", "telephoneNumber", "mobile",
-                    "company", "manager", "memberOf", "distinguishedName", "description",
-                    "whenCreated", "lastLogon", "accountExpires", "userAccountControl"
-                ]
-                result = ldap_client.search_s(base_dn, ldap.SCOPE_SUBTREE, search_filter, attrs)
-
-                if result:
-                    ldap_authenticated = True
-                    _, user_info_raw = result[0]
-                    ad_raw = decode_ldap_data(user_info_raw)
-                    print(f"AD Data for {username_ad}: {ad_raw}")  # your debug print
-
-                    display_name = ad_raw.get("displayName", [username.split("@")[0]])[0]
-                    email = ad_raw.get("mail", [username_ad])[0]
-                    first_name = ad_raw.get("givenName", [""])[0]
-                    last_name = ad_raw.get("sn", [""])[0]
-                    department_name = ad_raw.get("department", [""])[0]
-                    job_title = ad_raw.get("title", [""])[0]
-                    phone = ad_raw.get("telephoneNumber", [""])[0] or ad_raw.get("mobile", [""])[0] or ""
-
-                    # Employer number (employeeID)
-                    employee_id_raw = ad_raw.get("employeeID")
-                    employee_id = employee_id_raw[0] if employee_id_raw else f"LDAP_{username}_{int(timezone.now().timestamp())}"
-
-                    member_of = ad_raw.get("memberOf", [])
-                    ad_groups_json = json.dumps(member_of) if member_of else ""
-
-                ldap_client.unbind_s()
-
-            except ldap.INVALID_CREDENTIALS:
-                pass
-            except ldap.SERVER_DOWN:
-                logger.error("LDAP server unreachable")
-            except Exception as e:
-                logger.error(f"LDAP error: {str(e)}")
-
-        # Find or Create/Update Local User
+                directory_profile = ldap_client.get_client().authenticate(username_ad, password)
+                directory_reachable = True
+            except ldap_client.DirectoryUnavailable as e:
+                logger.error(f"LDAP unavailable, using local authentication: {e}")
+                directory_profile = None
+
+            if directory_profile:
+                ldap_authenticated = True
+                ad_raw = directory_profile
+
+        user = None
+
+        # Local DB authentication. When the directory answered and rejected
+        # the credentials, only accounts that are not directory users qualify.
+        if not ldap_authenticated:
+            user = User.objects.filter(name=username_ad).first()
+            if (
+                user is None
+                or (directory_reachable and user.is_ldap_user)
+                or not credentials.verify(user, password)
+            ):
+                return Response({"error": "Invalid username or password"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Find or Create Local User. Directory attributes are kept current by
+        # the sync_directory_users command; a login only records last_login.
         try:
-            user = None
-
-            if ldap_authenticated and email:
-                user = User.objects.filter(email=email).first()
-
-            if not user:
-                user = User.objects.filter(name=username_ad).first()
-
+            if ldap_authenticated:
+                email = ad_raw.get("mail", [None])[0]
+                if email:
+                    user = User.objects.filter(email=email).first()
+                if not user:
+                    user = User.objects.filter(name=username_ad).first()
+
+            now = timezone.now()
             if user:
+                update_fields = ["last_login"]
+                user.last_login = now
                 if ldap_authenticated:
-                    user.email = email
-                    user.firstname = first_name or display_name.split()[0] if display_name else user.firstname
-                    user.realname = display_name or getattr(user, 'realname', '')
-                    user.phone = phone or getattr(user, 'phone', '')
-                    user.mobile = phone or getattr(user, 'mobile', '')
-                    user.department = department_name or getattr(user, 'department', None)
-                    user.is_ldap_user = True
-                    user.employee_id = employee_id  # Employer number saved
-                    user.force_password_change = False
-                    if password:
-                        user.password = make_password(password)
-                    user.date_mod = timezone.now()
-                    user.date_sync = timezone.now()
-                    user.save()
+                    if not user.is_ldap_user or user.force_password_change:
+                        user.is_ldap_user = True
+                        user.force_password_change = False
+                        update_fields += ["is_ldap_user", "force_password_change"]
+                    # The local hash backs the fallback login; only rehash when
+                    # the directory password changed
+                    update_fields += credentials.ensure_password(user, password)
+                user.save(update_fields=update_fields)
+                if len(update_fields) > 1:
+                    profile.invalidate(user.id)
             else:
+                # First login of a directory user
                 user = User.objects.create(
                     name=username_ad,
-                    email=email if ldap_authenticated else username,
-                    firstname=first_name if ldap_authenticated else "",
-                    realname=display_name if ldap_authenticated else "",
-                    phone=phone if ldap_authenticated else "",
-                    mobile=phone if ldap_authenticated else "",
-                    department=department_name if ldap_authenticated else None,
-                    employee_id=employee_id,
-                    password=make_password(password),
-                    is_ldap_user=ldap_authenticated,
+                    password=credentials.hash_password(password),
+                    is_ldap_user=True,
                     force_password_change=False,
-                    date_creation=timezone.now(),
-                    date_mod=timezone.now(),
-                    date_sync=timezone.now(),
+                    last_login=now,
+                    date_creation=now,
+                    date_mod=now,
+                    date_sync=now,
+                    **directory_sync.user_attributes(ad_raw, directory_sync.department_map()),
                 )
 
-            # ────────────────────────────────────────────────
-            # Build SAFE response – show ALL data
-            # ────────────────────────────────────────────────
-            entities = []
-            entity_data = None
-            if getattr(user, 'entities_ids', []):
-                for eid in user.entities_ids:
-                    try:
-                        ent = Entity.objects.get(id=eid)
-                        entities.append({
-                            "id": ent.id,
-                            "name": ent.name,
-                            "display_name": getattr(ent, "display_name", ent.name),
-                            "logo": getattr(ent, 'logo', None).url if hasattr(ent, 'logo') and ent.logo else None,
-                        })
-                    except Entity.DoesNotExist:
-                        continue
-                entity_data = entities[0] if entities else None
-
-            roles = []
-            if getattr(user, 'roles_ids', []):
-                for rid in user.roles_ids:
-                    try:
-                        rol = Role.objects.get(id=rid)
-                        roles.append({"id": rol.id, "name": rol.name})
-                    except Role.DoesNotExist:
-                        continue
-            else:
-                roles = [{"id": None, "name": "user"}]
-
-            mappings = UserRoleMapping.objects.filter(user=user).select_related("role")
-            role_mappings = [
-                {
-                    "id": m.id,
-                    "role_id": m.role.id,
-                    "role_name": m.role.name,
-                    "user_id": m.user.id,
-                    "created_at": m.created_at,
-                    "updated_at": m.updated_at,
-                }
-                for m in mappings
-            ]
-
             refresh = RefreshToken.for_user(user)
 
-            # Build full, safe user_data
-            user_data = {
-                "id": user.id,
-                "name": user.name,
-                "employee_id": getattr(user, 'employee_id', None),           # Employer number from AD
-                "email": user.email,
-                "firstname": getattr(user, 'firstname', ""),
-                "realname": getattr(user, 'realname', ""),
-                "phone": getattr(user, 'phone', ""),                         # Phone from AD
-                "phone2": getattr(user, 'phone2', ""),
-                "mobile": getattr(user, 'mobile', ""),                       # Mobile from AD
-                "department": getattr(user, 'department', {}).name if getattr(user, 'department', None) else "",
-                "location": getattr(user, 'location', {}).name if getattr(user, 'location', None) else "",
-                "entities_ids": getattr(user, 'entities_ids', []),
-                "roles_ids": getattr(user, 'roles_ids', []),
-                "entities": entities,
-                "roles": roles,
-                "role_mappings": role_mappings,
-                "force_password_change": getattr(user, 'force_password_change', False),
-                "is_active": getattr(user, 'is_active', True),
-                "is_deleted": getattr(user, 'is_deleted', False),
-                "is_ldap_user": getattr(user, 'is_ldap_user', False),
-                "is_staff": getattr(user, 'is_staff', False),
-                "is_superuser": getattr(user, 'is_superuser', False),
-
-                # Safe defaults for all other fields in your model
-                "language": getattr(user, 'language', ""),
-                "use_mode": getattr(user, 'use_mode', 0),
-                "list_limit": getattr(user, 'list_limit', None),
-                "comment": getattr(user, 'comment', ""),
-                "auths_id": getattr(user, 'auths_id', 0),
-                "authtype": getattr(user, 'authtype', 0),
-                "last_login": getattr(user, 'last_login', None),
-                "date_mod": getattr(user, 'date_mod', None),
-                "date_sync": getattr(user, 'date_sync', None),
-                "profiles_id": getattr(user, 'profiles_id', 0),
-                "usertitles_id": getattr(user, 'usertitles_id', 0),
-                "usercategories_id": getattr(user, 'usercategories_id', 0),
-                "date_format": getattr(user, 'date_format', None),
-                "number_format": getattr(user, 'number_format', None),
-                "names_format": getattr(user, 'names_format', None),
-                "csv_delimiter": getattr(user, 'csv_delimiter', ""),
-                "is_ids_visible": getattr(user, 'is_ids_visible', None),
-                "use_flat_dropdowntree": getattr(user, 'use_flat_dropdowntree', None),
-                "show_jobs_at_login": getattr(user, 'show_jobs_at_login', None),
-                "priority_1": getattr(user, 'priority_1', ""),
-                "priority_2": getattr(user, 'priority_2', ""),
-                "priority_3": getattr(user, 'priority_3', ""),
-                "priority_4": getattr(user, 'priority_4', ""),
-                "priority_5": getattr(user, 'priority_5', ""),
-                "priority_6": getattr(user, 'priority_6', ""),
-                "followup_private": getattr(user, 'followup_private', None),
-                "task_private": getattr(user, 'task_private', None),
-                "default_requesttypes_id": getattr(user, 'default_requesttypes_id', None),
-                "password_forget_token": getattr(user, 'password_forget_token', ""),
-                "password_forget_token_date": getattr(user, 'password_forget_token_date', None),
-                "user_dn": getattr(user, 'user_dn', ""),
-                "registration_number": getattr(user, 'registration_number', ""),
-                "show_count_on_tabs": getattr(user, 'show_count_on_tabs', None),
-                "refresh_views": getattr(user, 'refresh_views', None),
-                "set_default_tech": getattr(user, 'set_default_tech', None),
-                "personal_token": getattr(user, 'personal_token', ""),
-                "personal_token_date": getattr(user, 'personal_token_date', None),
-                "api_token": getattr(user, 'api_token', ""),
-                "api_token_date": getattr(user, 'api_token_date', None),
-                "cookie_token": getattr(user, 'cookie_token', ""),
-                "cookie_token_date": getattr(user, 'cookie_token_date', None),
-                "display_count_on_home": getattr(user, 'display_count_on_home', None),
-                "notification_to_myself": getattr(user, 'notification_to_myself', None),
-                "duedateok_color": getattr(user, 'duedateok_color', ""),
-                "duedatewarning_color": getattr(user, 'duedatewarning_color', ""),
-                "duedatecritical_color": getattr(user, 'duedatecritical_color', ""),
-                "duedatewarning_less": getattr(user, 'duedatewarning_less', None),
-                "duedatecritical_less": getattr(user, 'duedatecritical_less', None),
-                "duedatewarning_unit": getattr(user, 'duedatewarning_unit', ""),
-                "duedatecritical_unit": getattr(user, 'duedatecritical_unit', ""),
-                "display_options": getattr(user, 'display_options', ""),
-                "is_deleted_ldap": getattr(user, 'is_deleted_ldap', False),
-                "pdffont": getattr(user, 'pdffont', ""),
-                "picture": getattr(user, 'picture', ""),
-                "begin_date": getattr(user, 'begin_date', None),
-                "end_date": getattr(user, 'end_date', None),
-                "keep_devices_when_purging_item": getattr(user, 'keep_devices_when_purging_item', None),
-                "privatebookmarkorder": getattr(user, 'privatebookmarkorder', ""),
-                "backcreated": getattr(user, 'backcreated', None),
-                "task_state": getattr(user, 'task_state', None),
-                "layout": getattr(user, 'layout', ""),
-                "palette": getattr(user, 'palette', ""),
-                "set_default_requester": getattr(user, 'set_default_requester', None),
-                "lock_autolock_mode": getattr(user, 'lock_autolock_mode', None),
-                "lock_directunlock_notification": getattr(user, 'lock_directunlock_notification', None),
-                "date_creation": getattr(user, 'date_creation', None),
-                "highcontrast_css": getattr(user, 'highcontrast_css', False),
-                "plannings": getattr(user, 'plannings', ""),
-                "sync_field": getattr(user, 'sync_field', ""),
-                "groups_id": getattr(user, 'groups_id', 0),
-                "users_id_supervisor": getattr(user, 'users_id_supervisor', 0),
-                "timezone": getattr(user, 'timezone', ""),
-                "default_dashboard_central": getattr(user, 'default_dashboard_central', ""),
-                "default_dashboard_assets": getattr(user, 'default_dashboard_assets', ""),
-                "default_dashboard_helpdesk": getattr(user, 'default_dashboard_helpdesk', ""),
-                "default_dashboard_mini_ticket": getattr(user, 'default_dashboard_mini_ticket', ""),
-                "player_id": getattr(user, 'player_id', ""),
-                "no_entity_mail_sent": getattr(user, 'no_entity_mail_sent', False),
-            }
+            # Compact profile by default; ?expand=full returns the legacy payload
+            expand_full = request.query_params.get("expand") == "full"
 
             response_data = {
                 "message": f"Login successful ({'AD/LDAP' if ldap_authenticated else 'Local DB'} Authenticated)",
-                "user": user_data,
-                "ad_raw": ad_raw if ldap_authenticated else None,
-                "refresh": str(refresh),
-                "access": str(refresh.access_token),
+                "user": profile.get_profile(user, full=expand_full),
             }
+            if expand_full:
+                response_data["ad_raw"] = ad_raw if ldap_authenticated else None
+            response_data["refresh"] = str(refresh)
+            response_data["access"] = str(refresh.access_token)
 
             return Response(response_data, status=status.HTTP_200_OK)
 
@@ -759,9 +567,10 @@ class ForgotPasswordView(APIView):
             return Response({"error": "No user found with this email"}, status=status.HTTP_404_NOT_FOUND)
 
         new_password = generate_random_password()
-        user.password = make_password(new_password)
+        update_fields = credentials.set_password(user, new_password)
         user.force_password_change = True  # Set flag to force change on next login
-        user.save(update_fields=["password", "force_password_change"])
+        user.save(update_fields=update_fields + ["force_password_change"])
+        profile.invalidate(user.id)
 
         try:
             send_mail(
@@ -806,18 +615,31 @@ class ChangePasswordView(APIView):
             )
 
         # Verify old password
-        if not check_password(old_password, user.password):
+        if not credentials.verify(user, old_password):
             return Response(
                 {"error": "Old password is incorrect"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Update password and reset force flag
-        user.password = make_password(new_password)
+        update_fields = credentials.set_password(user, new_password)
         user.force_password_change = False
-        user.save(update_fields=["password", "force_password_change"])
+        user.save(update_fields=update_fields + ["force_password_change"])
+        profile.invalidate(user.id)
 
         return Response(
             {"message": "Password changed successfully"}, 
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class MeView(APIView):
+    """
+    GET /api/me/                → cached compact profile of the current user
+    GET /api/me/?expand=full    → legacy login payload
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        expand_full = request.query_params.get("expand") == "full"
+        return Response(profile.get_profile(request.user, full=expand_full))